@@ -0,0 +1,209 @@
+"""
+
+``benchmarks.sorting``
+======================
+
+Reproducible benchmarks of the sorting methods of
+``algorithms.sorter.Numbers``. Every algorithm is run on every input
+distribution and size; the wall time (best of several repeats), the
+number of comparisons and moves (from an instrumented run, see
+``SortStats``) and the peak memory are recorded. The results are
+plain JSON, so two runs (e.g. on two commits) can be compared with
+``compare``.
+
+Run ``python -m benchmarks.sorting --help`` from the repository root.
+"""
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from algorithms.sorter import PARALLEL_THRESHOLD, Numbers, SortStats
+
+# Methods of Numbers being benchmarked, in the order of reporting
+ALGORITHMS = [
+    'bubble', 'insertion', 'insertion_sort_r', 'selection', 'merge_sort',
+    'merge_sort_bu', 'radix_sort', 'sort', 'parallel_sort',
+]
+
+# Quadratic (or deeply recursive) methods are skipped above these sizes
+SIZE_LIMITS = {
+    'bubble': 2000,
+    'insertion': 2000,
+    'selection': 2000,
+    'insertion_sort_r': 500,
+}
+
+# parallel_sort runs on a single worker below PARALLEL_THRESHOLD
+SIZES = [100, 1000, 10000, PARALLEL_THRESHOLD]
+
+
+def _random(n: int, rng: random.Random) -> list[int]:
+    return [rng.randint(-n, n) for _ in range(n)]
+
+
+def _sorted(n: int, rng: random.Random) -> list[int]:
+    return sorted(_random(n, rng))
+
+
+def _reversed(n: int, rng: random.Random) -> list[int]:
+    return sorted(_random(n, rng), reverse=True)
+
+
+def _few_unique(n: int, rng: random.Random) -> list[int]:
+    return [rng.randint(0, 9) for _ in range(n)]
+
+
+def _sawtooth(n: int, rng: random.Random) -> list[int]:
+    period = max(1, int(n ** 0.5))
+    return [i % period for i in range(n)]
+
+
+DISTRIBUTIONS: dict[str, Callable[[int, random.Random], list[int]]] = {
+    'random': _random,
+    'sorted': _sorted,
+    'reversed': _reversed,
+    'few_unique': _few_unique,
+    'sawtooth': _sawtooth,
+}
+
+
+def measure_time(algorithm: str, data: list[int], repeat: int) -> float:
+    """Return the best wall time in seconds of sorting a copy of data."""
+    best = float('inf')
+    for _ in range(repeat):
+        inst = Numbers(list(data))
+        method = getattr(inst, algorithm)
+        start = time.perf_counter()
+        method()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def count_operations(algorithm: str, data: list[int]) -> SortStats:
+    """Return the SortStats of an instrumented run of the algorithm."""
+    inst = Numbers(list(data), instrument=True)
+    getattr(inst, algorithm)()
+    return inst.stats
+
+
+def measure_memory(algorithm: str, data: list[int]) -> int:
+    """Return the peak memory in bytes allocated while sorting."""
+    inst = Numbers(list(data))
+    method = getattr(inst, algorithm)
+    tracemalloc.start()
+    try:
+        method()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(algorithms: list[str] | None = None,
+        distributions: list[str] | None = None,
+        sizes: list[int] | None = None,
+        repeat: int = 3,
+        seed: int = 0) -> dict[str, Any]:
+    """Run the benchmarks and return the results as a JSON-ready dict.
+
+    Parameters
+    ----------
+    algorithms : list[str] or None, default None
+        Names of the Numbers methods, ALGORITHMS if None.
+    distributions : list[str] or None, default None
+        Keys of DISTRIBUTIONS, all of them if None.
+    sizes : list[int] or None, default None
+        Input sizes, SIZES if None. Sizes above SIZE_LIMITS of an
+        algorithm are skipped for it.
+    repeat : int, default 3
+        The reported time is the best of that many runs.
+    seed : int, default 0
+        Seed of the input generator, the inputs depend only on it.
+
+    Returns
+    -------
+    dict[str, Any]
+        The ``meta`` entry describes the environment, the ``results``
+        entry holds one record per algorithm, distribution and size.
+    """
+    algorithms = algorithms or ALGORITHMS
+    distributions = distributions or list(DISTRIBUTIONS)
+    sizes = sizes or SIZES
+    results = []
+    for distribution in distributions:
+        for n in sizes:
+            data = DISTRIBUTIONS[distribution](n, random.Random(seed))
+            for algorithm in algorithms:
+                if n > SIZE_LIMITS.get(algorithm, n):
+                    continue
+                stats = count_operations(algorithm, data)
+                results.append({
+                    'algorithm': algorithm,
+                    'distribution': distribution,
+                    'size': n,
+                    'time': measure_time(algorithm, data, repeat),
+                    'comparisons': stats.comparisons,
+                    'moves': stats.moves,
+                    'peak_memory': measure_memory(algorithm, data),
+                })
+    return {'meta': _meta(seed, repeat), 'results': results}
+
+
+def _meta(seed: int, repeat: int) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'repeat': repeat,
+    }
+
+
+def compare(old: dict[str, Any], new: dict[str, Any],
+            tolerance: float = 0.1) -> list[str]:
+    """Return descriptions of the regressions of new against old.
+
+    A result is regressed when its time or peak memory grew by more than
+    the tolerance (a fraction) or when it makes more comparisons or
+    moves. Only the results present in both runs are compared.
+    """
+    def key(record):
+        return record['algorithm'], record['distribution'], record['size']
+
+    before = {key(record): record for record in old['results']}
+    regressions = []
+    for record in new['results']:
+        base = before.get(key(record))
+        if base is None:
+            continue
+        name = '{} on {} n={}'.format(*key(record))
+        for metric in ('time', 'peak_memory'):
+            if record[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{name}: {metric} {base[metric]:.6g} '
+                                   f'-> {record[metric]:.6g}')
+        for metric in ('comparisons', 'moves'):
+            if record[metric] > base.get(metric, record[metric]):
+                regressions.append(f'{name}: {metric} {base[metric]} '
+                                   f'-> {record[metric]}')
+    return regressions
+
+
+def save(results: dict[str, Any], path: str) -> None:
+    """Write the results to path as JSON."""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str) -> dict[str, Any]:
+    """Read results written by save."""
+    with open(path) as f:
+        return json.load(f)
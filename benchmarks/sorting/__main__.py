@@ -0,0 +1,52 @@
+"""Command line interface of the sorting benchmarks.
+
+Examples
+--------
+Benchmark everything and save the results::
+
+    python -m benchmarks.sorting --output base.json
+
+Benchmark again and report regressions against the saved results::
+
+    python -m benchmarks.sorting --output new.json --compare base.json
+"""
+import argparse
+import sys
+
+from benchmarks.sorting import (ALGORITHMS, DISTRIBUTIONS, SIZES, compare,
+                                load, run, save)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.sorting')
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS)
+    parser.add_argument('--distributions', nargs='+',
+                        choices=list(DISTRIBUTIONS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='report regressions against these results')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = run(args.algorithms, args.distributions, args.sizes,
+                  args.repeat, args.seed)
+    for record in results['results']:
+        print('{algorithm:>16} {distribution:>10} {size:>8} '
+              '{time:>12.6f}s {comparisons:>12} {moves:>12} '
+              '{peak_memory:>12}B'
+              .format(**record))
+    if args.output:
+        save(results, args.output)
+    if args.compare:
+        regressions = compare(load(args.compare), results, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""External (out-of-core) merge sort of numeric files.
+
+The input file is read in chunks that fit in the memory budget, every
+chunk is sorted with ``Numbers.sort`` and spilled to a temporary file as
+a sorted run. The runs are then k-way merged with a heap while being
+read through ``mmap``, at most ``fan_in`` runs at a time.
+"""
+import array
+import heapq
+import mmap
+import os
+import tempfile
+from contextlib import ExitStack
+
+from algorithms.sorter import INSERTION_THRESHOLD, Numbers, TYPECODES
+
+# Default memory budget in bytes
+MEMORY = 64 * 2**20
+
+# Default maximal number of runs merged at once
+FAN_IN = 64
+
+# Bytes Numbers.sort spends per run of INSERTION_THRESHOLD values on
+# the run boundaries, ints in lists for the current and next merge pass
+RUN_BYTES = 64
+
+
+def external_sort(source, target, typecode='d', text=False,
+                  memory=MEMORY, fan_in=FAN_IN, tmpdir=None):
+    '''Sort the numbers stored in the file source into the file target.
+
+    A binary file is a raw array of machine values of the given typecode
+    (as written by array.tofile), a text file holds one number per line.
+    At most memory bytes are used for the values at once (half of the
+    budget is left for the scratch buffer and the run boundaries of the
+    chunk sort) and at most fan_in runs are merged in one pass; more runs
+    are merged in several passes. Temporary runs are written to tmpdir.
+    '''
+    if typecode not in TYPECODES:
+        raise ValueError(f'Unsupported typecode {typecode!r}.')
+    if fan_in < 2:
+        raise ValueError(f'fan_in must be at least 2, {fan_in=} given.')
+    itemsize = array.array(typecode).itemsize
+    chunk_size = (memory * INSERTION_THRESHOLD
+                  // (2 * itemsize * INSERTION_THRESHOLD + RUN_BYTES))
+    if chunk_size < 1:
+        raise ValueError(f'memory budget too small: {memory=}.')
+    with tempfile.TemporaryDirectory(dir=tmpdir) as workdir:
+        runs = _sorted_runs(source, typecode, text, chunk_size, workdir)
+        # merge in passes until a single pass can produce the output
+        level = 0
+        while len(runs) > fan_in:
+            level += 1
+            merged = []
+            for k in range(0, len(runs), fan_in):
+                name = os.path.join(workdir, f'run-{level}-{k}')
+                with open(name, 'wb') as out:
+                    _merge_runs(runs[k:k+fan_in], out, typecode,
+                                False, chunk_size)
+                for run in runs[k:k+fan_in]:
+                    os.remove(run)
+                merged.append(name)
+            runs = merged
+        with open(target, 'w' if text else 'wb') as out:
+            _merge_runs(runs, out, typecode, text, chunk_size)
+
+
+def _sorted_runs(source, typecode, text, chunk_size, workdir):
+    '''Sort source chunk by chunk into run files and return their names'''
+    runs = []
+    for chunk in _read_chunks(source, typecode, text, chunk_size):
+        Numbers(chunk).sort()
+        runs.append(_spill(chunk, workdir, len(runs)))
+    return runs
+
+
+def _read_chunks(source, typecode, text, chunk_size):
+    '''Yield the contents of source as arrays of at most chunk_size items
+
+    The same array is yielded every time and refilled once the caller
+    asks for the next chunk, so a chunk must be consumed before that.
+    Only one chunk is then held at once.
+    '''
+    # no longer than the file, a line holds a digit and a newline at least
+    size = os.path.getsize(source)
+    itemsize = array.array(typecode).itemsize
+    chunk_size = min(chunk_size, (size + 1) // 2 if text else size // itemsize)
+    chunk = array.array(typecode, [0]) * chunk_size
+    if text:
+        convert = float if typecode in 'fd' else int
+        with open(source) as f:
+            size = 0
+            for line in f:
+                if line.strip():
+                    chunk[size] = convert(line)
+                    size += 1
+                    if size == chunk_size:
+                        yield chunk
+                        size = 0
+            if size:
+                del chunk[size:]
+                yield chunk
+        return
+    with open(source, 'rb') as f:
+        while True:
+            # read in place, fromfile would go through a bytes copy
+            with memoryview(chunk) as view, view.cast('B') as raw:
+                size = f.readinto(raw) // chunk.itemsize
+            if size < chunk_size:
+                del chunk[size:]
+            if not chunk:
+                return
+            yield chunk
+            if size < chunk_size:
+                return
+
+
+def _spill(chunk, workdir, k):
+    '''Write the sorted chunk to a new run file and return its name'''
+    name = os.path.join(workdir, f'run-0-{k}')
+    with open(name, 'wb') as f:
+        chunk.tofile(f)
+    return name
+
+
+def _merge_runs(runs, out, typecode, text, buffer_size):
+    '''Merge the sorted run files into the open file out.
+
+    The runs are memory-mapped and merged with a heap; the output is
+    written in batches of buffer_size values through a single buffer.
+    '''
+    with ExitStack() as stack:
+        views = []
+        for run in runs:
+            # unbuffered, the file is only mapped
+            f = stack.enter_context(open(run, 'rb', buffering=0))
+            mm = stack.enter_context(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            views.append(stack.enter_context(memoryview(mm).cast(typecode)))
+        # filled in place, growing it by appends would reallocate it
+        buffer_size = min(buffer_size, sum(map(len, views)))
+        batch = array.array(typecode, [0]) * buffer_size
+        size = 0
+        for value in heapq.merge(*views):
+            batch[size] = value
+            size += 1
+            if size == buffer_size:
+                _write(batch, out, text)
+                size = 0
+        del batch[size:]
+        _write(batch, out, text)
+
+
+def _write(batch, out, text):
+    '''Write the array batch to out as text lines or raw values'''
+    if text:
+        out.writelines(f'{value!r}\n' for value in batch)
+    else:
+        batch.tofile(out)
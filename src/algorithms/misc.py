@@ -1,23 +1,388 @@
-import math, random
+import array
+import functools
+import operator
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# to_base converts numbers of at most this many digits one digit at a
+# time; larger ones are split in halves by powers of N**(2**k)
+TO_BASE_CUTOFF = 32
+
+# to_base_many converts this many values at a time without numpy
+TO_BASE_CHUNK = 4096
+
+# mul_digits multiplies by schoolbook when the shorter factor has at most
+# this many digits; above it packing into ints wins (measured for bases 2
+# to 2**16)
+MUL_THRESHOLD = 8
+
+# array typecodes of unsigned ints of 1, 2, 4 and 8 bytes
+_UNSIGNED_CODES = {array.array(code).itemsize: code for code in 'QLIHB'}
 
 def to_base(m, N=2):
-    mm = []
-    net = 0
-    aa = m % N
-    mm.append(aa)
-    while m > 0 and net < 1000:
-      net += 1
-      m = int((m - aa) / N)
-      aa = m % N
-      mm.append(aa)
-    return mm[:-1]
+    # little-endian digits of m in base N, [] for m <= 0
+    if N < 2:
+      raise ValueError(f'Base must be at least 2, {N=} given.')
+    if m <= 0:
+      return []
+    if N & (N - 1) == 0:
+      return _to_base_pow2(m, N.bit_length() - 1)
+    powers = _powers(m, N)
+    digits = []
+    _to_base_split(m, len(powers) - 1, N, powers, digits)
+    while digits[-1] == 0:
+      digits.pop()
+    return digits
+
+def _powers(m, N):
+    # powers[k] = N**(2**k), the last one is above sqrt(m)
+    powers = [N]
+    while powers[-1] * powers[-1] <= m:
+      powers.append(powers[-1] * powers[-1])
+    return powers
+
+def _to_base_split(m, level, N, powers, digits):
+    # append exactly 2**(level+1) digits of m < N**(2**(level+1))
+    width = 2 << level
+    if width <= TO_BASE_CUTOFF:
+      for _ in range(width):
+        m, digit = divmod(m, N)
+        digits.append(digit)
+      return
+    high, low = divmod(m, powers[level])
+    _to_base_split(low, level - 1, N, powers, digits)
+    _to_base_split(high, level - 1, N, powers, digits)
+
+def _to_base_pow2(m, k):
+    # base 2**k: read the digits from the bytes or from the bit string
+    if 8 % k == 0:
+      mask = (1 << k) - 1
+      shifts = range(0, 8, k)
+      digits = [byte >> shift & mask
+                for byte in m.to_bytes((m.bit_length() + 7) // 8, 'little')
+                for shift in shifts]
+      while digits[-1] == 0:
+        digits.pop()
+      return digits
+    bits = format(m, 'b')
+    bits = '0' * (-len(bits) % k) + bits
+    return [int(bits[i:i+k], 2) for i in range(len(bits) - k, -1, -k)]
+
+def iter_digits(m, N=2):
+    # Iterator over the digits of m in base N, most significant first,
+    # i.e. reversed(to_base(m, N)) produced lazily: the top halves are
+    # split off first and the low halves are only converted once their
+    # digits are reached, so taking the leading k digits does not pay
+    # for the rest. Nothing is produced for m <= 0.
+    if N < 2:
+      raise ValueError(f'Base must be at least 2, {N=} given.')
+    if m <= 0:
+      return iter(())
+    if N & (N - 1) == 0:
+      k = N.bit_length() - 1
+      bits = format(m, 'b')
+      bits = '0' * (-len(bits) % k) + bits
+      return (int(bits[i:i+k], 2) for i in range(0, len(bits), k))
+    powers = _powers(m, N)
+    return _iter_digits(_iter_split(m, len(powers) - 1, N, powers))
+
+def _iter_digits(blocks):
+    # flatten the blocks of digits, skipping the leading zeros
+    for block in blocks:
+      for i, digit in enumerate(block):
+        if digit:
+          yield from block[i:]
+          for block in blocks:
+            yield from block
+          return
+
+def _iter_split(m, level, N, powers):
+    # yield the 2**(level+1) digits of m < N**(2**(level+1)), most
+    # significant first, in blocks of at most TO_BASE_CUTOFF digits
+    width = 2 << level
+    if width <= TO_BASE_CUTOFF:
+      block = []
+      for _ in range(width):
+        m, digit = divmod(m, N)
+        block.append(digit)
+      block.reverse()
+      yield block
+      return
+    high, low = divmod(m, powers[level])
+    yield from _iter_split(high, level - 1, N, powers)
+    yield from _iter_split(low, level - 1, N, powers)
+
+def to_base_many(values, N=2, width=None, out=None):
+    # Digits of many nonnegative ints at once: row i holds the width
+    # little-endian digits of values[i] (to_base padded with zeros).
+    # width defaults to the number of digits of the largest value.
+    # Values that are not integers (floats, float dtypes) raise
+    # ValueError.
+    # The result type depends only on whether numpy is installed: with
+    # numpy it is always a (len(values), width) ndarray (computed by
+    # vectorized divmod passes when the values fit 64 bits), without it
+    # a list of lists.
+    # out may be a writable buffer (bytearray, array.array, ndarray) of
+    # at least len(values) * width items; the rows are then written into
+    # it one after another and out is returned.
+    if N < 2:
+      raise ValueError(f'Base must be at least 2, {N=} given.')
+    if np is not None:
+      keys = np.asarray(values)
+      if not keys.size:
+        keys = keys.astype(np.int64)
+      if keys.dtype.kind not in 'iuO':
+        raise ValueError(f'Values must be integers, not {keys.dtype}.')
+      if keys.dtype.kind != 'O' and N < 2**63:
+        return _to_base_many_numpy(keys, N, width, out)
+    try:
+      values = [operator.index(value) for value in values]
+    except TypeError:
+      raise ValueError('Values must be integers.') from None
+    if values and min(values) < 0:
+      raise ValueError('Values must be nonnegative.')
+    if width is None:
+      width = max(len(to_base(max(values, default=0), N)), 1)
+    elif values and max(values) >= N**width:
+      # before anything is written into out
+      raise ValueError(f'Values do not fit in {width} digits.')
+    view = None if out is None else _flat_view(out, len(values) * width, N)
+    rows = []
+    for start in range(0, len(values), TO_BASE_CHUNK):
+      chunk = values[start:start+TO_BASE_CHUNK]
+      # one pass over the chunk per digit position
+      columns = []
+      for _ in range(width):
+        columns.append([value % N for value in chunk])
+        chunk = [value // N for value in chunk]
+      if view is None:
+        rows.extend(map(list, zip(*columns)))
+      else:
+        digits = [digit for row in zip(*columns) for digit in row]
+        view[start*width:start*width+len(digits)] = array.array(
+          view.format.lstrip('@='), digits)
+    if out is not None:
+      return out
+    if np is not None:
+      return np.array(rows, dtype=_digit_dtype(N)).reshape(len(rows), width)
+    return rows
+
+def _to_base_many_numpy(keys, N, width, out):
+    # to_base_many by one vectorized divmod pass per digit position
+    if keys.size and keys.min() < 0:
+      raise ValueError('Values must be nonnegative.')
+    # narrow dtypes cannot hold N, numpy would raise OverflowError
+    keys = keys.astype(np.uint64 if keys.dtype.kind == 'u' else np.int64,
+                       copy=False)
+    if width is None:
+      width = max(len(to_base(int(keys.max(initial=0)), N)), 1)
+    elif keys.size and int(keys.max()) >= N**width:
+      raise ValueError(f'Values do not fit in {width} digits.')
+    if out is None:
+      rows = np.empty((len(keys), width), dtype=_digit_dtype(N))
+    else:
+      rows = np.asarray(_flat_view(out, len(keys) * width, N))
+      rows = rows[:len(keys)*width].reshape(len(keys), width)
+    for j in range(width):
+      keys, rows[:, j] = np.divmod(keys, N)
+    return rows if out is None else out
+
+def _digit_dtype(N):
+    # smallest of the dtypes used for digits of base N
+    if N <= 256:
+      return np.uint8
+    return np.int64 if N < 2**63 else object
+
+def _flat_view(out, size, N):
+    # one-dimensional memoryview of the buffer out, checked to hold size
+    # digits of base N
+    view = memoryview(out)
+    if view.ndim != 1:
+      view = view.cast('B').cast(view.format.lstrip('@='))
+    if len(view) < size:
+      raise ValueError(f'Output buffer too small: {len(view)} < {size}.')
+    try:
+      array.array(view.format.lstrip('@='), [N - 1])
+    except (OverflowError, TypeError, ValueError):
+      raise ValueError(f'Output items cannot hold digits of base {N}.')
+    return view
+
+# bytes of bit values 0/1 <-> bytes of characters '0'/'1'
+_BITS_TO_TEXT = bytes.maketrans(b'\0\1', b'01')
+_TEXT_TO_BITS = bytes.maketrans(b'01', b'\0\1')
+
+@functools.total_ordering
+class BitVector(object):
+    # An unsigned binary number of a fixed width packed into a Python int,
+    # so that arithmetic runs on whole machine words (in C) instead of one
+    # bit per step. Like machine words, add, subtract and left shift wrap
+    # modulo 2**width; add_with_carry also returns the carry out. The
+    # operands must have equal widths, ints are taken modulo 2**width.
+    # Comparisons are by numeric value, with BitVectors of any width and
+    # with ints alike, so BitVector(1, 8) < 257 and BitVector(5, 8) == 5.
+    __slots__ = ('value', 'width')
+
+    def __init__(self, value=0, width=64):
+      if width < 0:
+        raise ValueError(f'Width must be nonnegative, {width=} given.')
+      if value < 0 or value >> width:
+        raise ValueError(f'{value} does not fit in {width} bits.')
+      self.value = value
+      self.width = width
+
+    @classmethod
+    def from_bits(cls, bits):
+      # from a little-endian list of bits, as used by adbin
+      text = bytes(reversed(bits))
+      if text.strip(b'\0\1'):
+        raise ValueError('Bits must be 0 or 1.')
+      return cls(int(text.translate(_BITS_TO_TEXT) or b'0', 2), len(bits))
+
+    def to_bits(self):
+      # little-endian list of exactly self.width bits
+      if not self.width:
+        return []
+      text = format(self.value, f'0{self.width}b').encode()
+      return list(text[::-1].translate(_TEXT_TO_BITS))
+
+    def _operand(self, other):
+      if isinstance(other, BitVector):
+        if other.width != self.width:
+          raise ValueError(f'Widths differ: {self.width} != {other.width}.')
+        return other.value
+      if isinstance(other, int):
+        return other & ((1 << self.width) - 1)
+      return NotImplemented
+
+    def _wrap(self, value):
+      return BitVector(value & ((1 << self.width) - 1), self.width)
+
+    def add_with_carry(self, other):
+      value = self._operand(other)
+      if value is NotImplemented:
+        raise TypeError(f'Cannot add {type(other)} to BitVector.')
+      total = self.value + value
+      return self._wrap(total), total >> self.width
+
+    def __add__(self, other):
+      other = self._operand(other)
+      if other is NotImplemented:
+        return other
+      return self._wrap(self.value + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+      other = self._operand(other)
+      if other is NotImplemented:
+        return other
+      return self._wrap(self.value - other)
+
+    def __lshift__(self, k):
+      return self._wrap(self.value << k)
+
+    def __rshift__(self, k):
+      return BitVector(self.value >> k, self.width)
+
+    def _compared(self, other):
+      # the numeric value of other, not reduced modulo 2**width
+      if isinstance(other, BitVector):
+        return other.value
+      if isinstance(other, int):
+        return other
+      return NotImplemented
+
+    def __eq__(self, other):
+      other = self._compared(other)
+      if other is NotImplemented:
+        return other
+      return self.value == other
+
+    def __lt__(self, other):
+      other = self._compared(other)
+      if other is NotImplemented:
+        return other
+      return self.value < other
+
+    def __hash__(self):
+      # equal to the hash of the equal int
+      return hash(self.value)
+
+    def __int__(self):
+      return self.value
+
+    __index__ = __int__
+
+    def __len__(self):
+      return self.width
+
+    def __repr__(self):
+      return f'BitVector({self.value:#x}, width={self.width})'
 
 def adbin(a, b, n):
-    #n = len(a) + 1
-    c = [0 for i in range(n+1)]
-    memory = 0
-    for i in range(n):
-      c[i] = (a[i] + b[i] + memory) % 2
-      memory = math.floor((a[i] + b[i] + memory) / 2)
-    c[n] = memory
-    return c
+    # sum of the n-bit little-endian numbers a and b as n+1 bits
+    total, carry = BitVector.from_bits(a[:n]).add_with_carry(
+      BitVector.from_bits(b[:n]))
+    return total.to_bits() + [carry]
+
+def mul_digits(a, b, N=2):
+    # Product of the little-endian base N digit lists a and b as exactly
+    # len(a) + len(b) digits. Short factors are multiplied by schoolbook.
+    # Longer ones by Kronecker substitution: the digits are packed into
+    # fixed-width byte slots of two ints, wide enough for any coefficient
+    # of the product polynomial, the ints are multiplied once (CPython
+    # uses Karatsuba for that) and the coefficients are read back from
+    # the slots. Either way a single carry pass in base N ends the job,
+    # and no conversion between bases is ever done.
+    if N < 2:
+      raise ValueError(f'Base must be at least 2, {N=} given.')
+    for digits in (a, b):
+      if digits and not 0 <= min(digits) <= max(digits) < N:
+        raise ValueError(f'Digits must be in range({N}).')
+    n, m = len(a), len(b)
+    if min(n, m) <= MUL_THRESHOLD:
+      coefficients = [0] * (n + m)
+      for i, x in enumerate(a):
+        if x:
+          for j, y in enumerate(b):
+            coefficients[i+j] += x * y
+    else:
+      coefficients = _kronecker(a, b, min(n, m) * (N - 1) ** 2)
+    product = [0] * (n + m)
+    carry = 0
+    for i, coefficient in enumerate(coefficients):
+      carry, product[i] = divmod(coefficient + carry, N)
+    return product
+
+def _kronecker(a, b, bound):
+    # coefficients of the polynomial product of a and b, none above bound
+    width = max((bound.bit_length() + 7) // 8, 1)
+    size = len(a) + len(b)
+    if width <= 8:
+      # round up to the size of an unsigned machine int
+      width = 1 << (width - 1).bit_length()
+      code = _UNSIGNED_CODES[width]
+      x = int.from_bytes(_little_endian(array.array(code, a)), 'little')
+      y = int.from_bytes(_little_endian(array.array(code, b)), 'little')
+      coefficients = array.array(code)
+      coefficients.frombytes((x * y).to_bytes(size * width, 'little'))
+      if sys.byteorder == 'big':
+        coefficients.byteswap()
+      return coefficients
+    x = int.from_bytes(b''.join(d.to_bytes(width, 'little') for d in a),
+                       'little')
+    y = int.from_bytes(b''.join(d.to_bytes(width, 'little') for d in b),
+                       'little')
+    raw = (x * y).to_bytes(size * width, 'little')
+    return [int.from_bytes(raw[i:i+width], 'little')
+            for i in range(0, len(raw), width)]
+
+def _little_endian(values):
+    # bytes of the array values with every item stored little-endian
+    if sys.byteorder == 'big':
+      values.byteswap()
+    return values.tobytes()
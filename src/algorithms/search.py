@@ -1,30 +1,671 @@
+import array
+import mmap
+import operator
+import struct
+import sys
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import compress, count, islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from algorithms.sorter import Numbers, TYPECODES
+
+
 class InputError(ValueError): pass
 
 
-def binary_search(value, a_list, bottom, top):
+# interpolation_search falls back to bisection after this many probes
+# per bit of the length of the searched range
+INTERPOLATION_PROBES = 2
+
+# adaptive_search samples this many keys to judge their distribution
+UNIFORMITY_SAMPLES = 16
+
+# ... and picks interpolation if no sample is further than this fraction
+# of the key range from the straight line between the first and last key
+UNIFORMITY_TOLERANCE = 0.05
+
+# Default absolute tolerance of bisect_predicate_float
+BISECT_TOLERANCE = 1e-9
+
+# sorted_prefix compares typed buffers in blocks of this many elements,
+# stopping at the first block with a descent
+SORTED_BLOCK = 1 << 16
+
+# Header of the files written by write_index: magic, byte order of the
+# values ('<' or '>'), their array typecode and their number
+INDEX_MAGIC = b'ALGIDX'
+INDEX_HEADER = struct.Struct('<6sccQ')
+_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+# Default number of results kept by a SearchCache
+CACHE_SIZE = 1024
+
+# Results of is_sorted for sequences with a version attribute (such as
+# algorithms.sorter.Numbers), kept by id as (weakref, version, result):
+# the sequences need not be hashable
+_sorted_cache = {}
+
+
+def binary_search(value, a_list, bottom, top, trusted=False):
     '''Return i for which a_list[i] == value, else None.
     
-    The input a_list must be sorted in ascending ordrer.
+    The input a_list must be sorted in ascending ordrer. This is checked
+    unless trusted is True; for a sequence with a version attribute the
+    check is done once per version and remembered.
+    '''
+    if not trusted:
+        _require_sorted(a_list)
+    while bottom <= top:
+        middle = (bottom + top) // 2
+        if value == a_list[middle]:
+            return middle
+        elif value < a_list[middle]:
+            top = middle - 1
+        else:
+            bottom = middle + 1
+    return None
+
+def lower_bound(value, a_list, bottom=0, top=None):
+    '''Return the first i in [bottom, top+1] with a_list[i] >= value.
+
+    This is the leftmost position at which value can be inserted into
+    the sorted a_list[bottom:top+1] keeping it sorted; top defaults to
+    the last index. The search is iterative and sortedness of a_list is
+    assumed, not checked, so it takes O(log n) time.
+    '''
+    if top is None:
+        top = len(a_list) - 1
+    return bisect_left(a_list, value, bottom, top + 1)
+
+def upper_bound(value, a_list, bottom=0, top=None):
+    '''Return the first i in [bottom, top+1] with a_list[i] > value.
+
+    This is the rightmost insertion point of value, see lower_bound.
+    '''
+    if top is None:
+        top = len(a_list) - 1
+    return bisect_right(a_list, value, bottom, top + 1)
+
+def equal_range(value, a_list):
+    '''Return (i, j) such that a_list[i:j] are the keys equal to value.
+
+    If value is absent, then i == j is its insertion point.
+    '''
+    i = lower_bound(value, a_list)
+    return i, upper_bound(value, a_list, i)
+
+def count_in_range(lo, hi, a_list):
+    '''Return the number of keys k of the sorted a_list with lo <= k <= hi.'''
+    if hi < lo:
+        return 0
+    i = lower_bound(lo, a_list)
+    return upper_bound(hi, a_list, i) - i
+
+def bisect_predicate(pred, lo, hi):
+    '''Return the first integer i in [lo, hi] with pred(i) true.
+
+    pred must be monotone on [lo, hi], false up to some point and true
+    from there on; hi + 1 is returned if it is never true. This is
+    lower_bound over the virtual sequence pred(lo), ..., pred(hi): pred
+    is called at most about log2(hi - lo + 2) times and nothing is
+    materialized, so the range may be as large as needed.
+    '''
+    if hi < lo - 1:
+        raise InputError(f'Invalid interval [{lo}, {hi}].')
+    hi += 1
+    while lo < hi:
+        middle = (lo + hi) // 2
+        if pred(middle):
+            hi = middle
+        else:
+            lo = middle + 1
+    return lo
+
+def bisect_predicate_float(pred, lo, hi, tolerance=BISECT_TOLERANCE):
+    '''Return x within tolerance above the boundary of pred in [lo, hi].
+
+    pred must be monotone on the real interval [lo, hi], false below a
+    boundary and true above it. The interval is halved until the boundary
+    lies in (x - tolerance, x], which takes about
+    log2((hi - lo) / tolerance) calls of pred, or until floats cannot
+    split it any further. pred is never called at lo or hi, so hi is
+    returned if it is never true.
+    '''
+    if not lo <= hi:
+        raise InputError(f'Invalid interval [{lo}, {hi}].')
+    if not tolerance > 0:
+        raise InputError(f'tolerance must be positive, {tolerance=} given.')
+    while hi - lo > tolerance:
+        middle = lo + (hi - lo) / 2
+        if middle <= lo or middle >= hi:
+            break  # adjacent floats
+        if pred(middle):
+            hi = middle
+        else:
+            lo = middle
+    return hi
+
+def search_many(values, a_list, insertion_points=False, trusted=False):
+    '''Return the results of searching a_list for each of the values.
+
+    For every value the index of its first occurrence in a_list is
+    returned, or None if it is absent. With insertion_points=True the
+    leftmost positions at which the values could be inserted keeping
+    a_list sorted are returned instead. The sortedness of a_list is
+    checked as in binary_search.
+
+    If values are sorted, they are looked up in a single left-to-right
+    sweep (each search starts where the previous one ended). If numpy is
+    available and either a_list or values is an ndarray, the whole batch
+    is bisected at once with numpy.searchsorted.
+    '''
+    if not trusted:
+        _require_sorted(a_list)
+    data = a_list.a_list if isinstance(a_list, Numbers) else a_list
+    n = len(data)
+    if np is not None and (isinstance(data, np.ndarray)
+                           or isinstance(values, np.ndarray)):
+        data = np.asarray(data)
+        queries = np.asarray(values)
+        positions = np.searchsorted(data, queries)
+        if insertion_points:
+            return positions.tolist()
+        found = positions < n
+        found[found] = data[positions[found]] == queries[found]
+        return [int(i) if hit else None
+                for i, hit in zip(positions.tolist(), found.tolist())]
+    values = list(values)
+    if all(map(operator.le, values, islice(values, 1, None))):
+        positions = []
+        bottom = 0
+        for value in values:
+            bottom = bisect_left(data, value, bottom)
+            positions.append(bottom)
+    else:
+        positions = [bisect_left(data, value) for value in values]
+    if insertion_points:
+        return positions
+    return [i if i < n and data[i] == value else None
+            for i, value in zip(positions, values)]
+
+def interpolation_search(value, a_list, bottom=0, top=None, trusted=False):
+    '''Return i for which a_list[i] == value, else None.
+
+    Like binary_search, but the next probe is placed where value would be
+    if the numeric keys of a_list[bottom:top+1] were evenly spaced, which
+    takes O(log log n) probes on uniformly distributed keys. After
+    INTERPOLATION_PROBES probes per bit of the range length the search
+    falls back to bisection, so it never takes more than O(log n) probes.
+    '''
+    if not trusted:
+        _require_sorted(a_list)
+    if top is None:
+        top = len(a_list) - 1
+    budget = INTERPOLATION_PROBES * (top - bottom + 1).bit_length()
+    # Python numbers, fixed-width numpy scalars would overflow
+    key = _scalar(value)
+    while bottom <= top:
+        low, high = _scalar(a_list[bottom]), _scalar(a_list[top])
+        if key < low or key > high:
+            return None
+        if budget > 0 and high != low:
+            budget -= 1
+            middle = bottom + int((key - low) * (top - bottom)
+                                  // (high - low))
+            middle = min(max(middle, bottom), top)
+        else:
+            middle = (bottom + top) // 2
+        if value == a_list[middle]:
+            return middle
+        elif value < a_list[middle]:
+            top = middle - 1
+        else:
+            bottom = middle + 1
+    return None
+
+def exponential_search(value, a_list, start=0):
+    '''Return i for which a_list[i] == value, else None.
+
+    Starting at position start, probe positions start +- 1, 3, 7, 15,
+    ... until value is bracketed, then bisect the bracket. This takes
+    O(log d) probes where d is the distance between start and the
+    result, so it is fast when the previous hit is a good hint. len is
+    never called: a position raising IndexError is treated as lying past
+    the end, so a_list may be unbounded or backed by a stream. The
+    sortedness of a_list is assumed, not checked.
+    '''
+    def below(i):
+        '''Return True if a_list[i] < value, False past the end'''
+        if i < 0:
+            return True
+        try:
+            return a_list[i] < value
+        except IndexError:
+            return False
+
+    if below(start):
+        # gallop right: a_list[bottom] < value <= a_list[top]
+        bottom, step = start, 1
+        while below(start + step):
+            bottom = start + step
+            step *= 2
+        top = start + step
+    else:
+        # gallop left: a_list[bottom] < value <= a_list[top]
+        top, step = start, 1
+        while not below(start - step):
+            top = start - step
+            step *= 2
+        bottom = start - step
+    # find the first position not below value
+    while top - bottom > 1:
+        middle = (bottom + top) // 2
+        if below(middle):
+            bottom = middle
+        else:
+            top = middle
+    try:
+        if a_list[top] == value:
+            return top
+    except IndexError:
+        pass
+    return None
+
+def adaptive_search(value, a_list, hint=None, trusted=False):
+    '''Return i for which a_list[i] == value, else None.
+
+    With a hint (e.g. the index of the previous hit) exponential_search
+    is started from it. Otherwise UNIFORMITY_SAMPLES evenly spaced keys
+    are sampled; if they lie close to a straight line the keys are taken
+    for uniformly distributed and interpolation_search is used, else
+    binary_search.
+    '''
+    if not trusted:
+        _require_sorted(a_list)
+    if hint is not None:
+        return exponential_search(value, a_list, hint)
+    top = len(a_list) - 1
+    if _looks_uniform(a_list):
+        return interpolation_search(value, a_list, 0, top, trusted=True)
+    return binary_search(value, a_list, 0, top, trusted=True)
+
+def _looks_uniform(a_list):
+    '''Return True if a sample of numeric a_list is close to linear.'''
+    n = len(a_list)
+    if n < UNIFORMITY_SAMPLES:
+        return False
+    first, last = _scalar(a_list[0]), _scalar(a_list[n-1])
+    try:
+        span = last - first
+        if span <= 0:
+            return False
+        for k in range(1, UNIFORMITY_SAMPLES - 1):
+            i = k * (n - 1) // (UNIFORMITY_SAMPLES - 1)
+            expected = first + span * i / (n - 1)
+            deviation = abs(_scalar(a_list[i]) - expected)
+            if deviation > UNIFORMITY_TOLERANCE * span:
+                return False
+    except TypeError:  # keys are not numbers
+        return False
+    return True
+
+def _scalar(value):
+    '''Return a numpy scalar as the Python number, other values as is.'''
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def is_sorted(a_list):
+    '''Return True if a_list is sorted, False otherwise.'''
+    return sorted_prefix(a_list) == len(a_list)
+
+def sorted_prefix(a_list, workers=1):
+    '''Return the length of the longest sorted prefix of a_list.
+
+    It equals len(a_list) if a_list is sorted; otherwise it is the index
+    of the first element smaller than its predecessor. Numeric ndarrays,
+    array.arrays and memoryviews (also inside Numbers) are compared with
+    numpy, when available, SORTED_BLOCK elements at a time; with workers
+    > 1 the blocks are spread over that many threads (numpy releases
+    the GIL), and blocks after an already found descent are skipped.
+    Other sequences are scanned by iterators running in C.
+    '''
+    if isinstance(a_list, Numbers):
+        a_list = a_list.a_list
+    n = len(a_list)
+    data = _as_ndarray(a_list)
+    if data is None:
+        descents = map(operator.gt, a_list, islice(a_list, 1, None))
+        return next(compress(count(1), descents), n)
+    blocks = range(0, max(n - 1, 0), SORTED_BLOCK)
+    # the smallest descent found so far, blocks past it are not checked
+    found = [n]
+    lock = threading.Lock()
+
+    def check(block):
+        if block >= found[0]:
+            return
+        segment = data[block:block + SORTED_BLOCK + 1]
+        descents = np.flatnonzero(segment[1:] < segment[:-1])
+        if descents.size:
+            with lock:
+                found[0] = min(found[0], block + int(descents[0]) + 1)
+
+    if workers > 1 and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(check, blocks))
+    else:
+        for block in blocks:
+            check(block)
+            if found[0] < n:
+                break
+    return found[0]
+
+def _as_ndarray(a_list):
+    '''Return a numeric typed buffer as an ndarray without copying.
+
+    Return None if numpy is missing or a_list is not such a buffer.
     '''
-    if not is_sorted(a_list):
+    if np is None:
+        return None
+    if isinstance(a_list, array.array):
+        if a_list.typecode in 'uw':
+            return None
+        return np.frombuffer(a_list, dtype=a_list.typecode)
+    if isinstance(a_list, memoryview):
+        a_list = np.asarray(a_list)
+    if isinstance(a_list, np.ndarray) and a_list.ndim == 1 \
+            and a_list.dtype.kind in 'iuf':
+        return a_list
+    return None
+
+def _buffer_typecode(a_list):
+    '''Return the array typecode of an array.array or ndarray, else None'''
+    if isinstance(a_list, array.array):
+        return a_list.typecode
+    if np is not None and isinstance(a_list, np.ndarray):
+        return a_list.dtype.char
+    return None
+
+def _is_double(x):
+    '''Return True if x is a float or an int that a float holds exactly'''
+    if isinstance(x, float):
+        return True
+    try:
+        return isinstance(x, int) and float(x) == x
+    except OverflowError:
+        return False
+
+def _require_sorted(a_list):
+    '''Raise InputError if a_list is not sorted.'''
+    if not _is_sorted_cached(a_list):
         error_message = \
             'sorted input expected but unsorted given: a_list'
         raise InputError(error_message)
-    if bottom > top:
-        return None
-    middle = (bottom + top) // 2
-    if value == a_list[middle]:
-        return middle
-    elif value < a_list[middle]:
-        return binary_search(value, a_list,
-            bottom, middle-1)
+
+def _is_sorted_cached(a_list):
+    '''Return is_sorted(a_list), cached against a_list.version if any.'''
+    version = getattr(a_list, 'version', None)
+    if version is None:
+        return is_sorted(a_list)
+    key = id(a_list)
+    entry = _sorted_cache.get(key)
+    # the id of a collected sequence may have been reused
+    if entry is not None and entry[0]() is a_list:
+        if entry[1] == version:
+            return entry[2]
+        ref = entry[0]
     else:
-        return binary_search(value, a_list, middle+1, top)
+        def forget(ref):
+            if _sorted_cache.get(key, (None,))[0] is ref:
+                _sorted_cache.pop(key, None)
+        try:
+            ref = weakref.ref(a_list, forget)
+        except TypeError:  # a_list cannot be weakly referenced
+            return is_sorted(a_list)
+    result = is_sorted(a_list)
+    _sorted_cache[key] = (ref, version, result)
+    return result
 
-def is_sorted(a_list):
-    '''Return True if a_list is sorted, False otherwise.'''
-    n = len(a_list) - 1
-    for i in range(n):
-        if a_list[i] > a_list[i+1]:
-            return False
-    return True
\ No newline at end of file
+
+class SearchIndex(object):
+    '''A read-only index for lower/upper bound queries on sorted keys.
+
+    The keys are stored in Eytzinger (breadth-first) order in a single
+    contiguous array.array: the root of the implicit binary search tree
+    is at position 1 and the children of position k are at 2k and 2k+1.
+    A query walks down the tree with one comparison and no branch per
+    level, and the first levels, visited by every query, share a few
+    cache lines. Keys of an array.array or a numeric ndarray keep their
+    typecode, other integer keys are stored as 'q' and floats as 'd'
+    (with the ints among them if doubles hold them exactly); keys of
+    other types are kept in a list in the same order.
+    '''
+
+    def __init__(self, a_list):
+        if not is_sorted(a_list):
+            error_message = \
+                'sorted input expected but unsorted given: a_list'
+            raise InputError(error_message)
+        n = len(a_list)
+        self._n = n
+        self._tree = self._storage(a_list, n + 1)
+        # sorted position of the key at each tree position
+        self._rank = array.array('q', bytes(8 * (n + 1)))
+        # in-order walk of the implicit tree fills it with sorted keys
+        stack, k, i = [], 1, 0
+        while stack or k <= n:
+            while k <= n:
+                stack.append(k)
+                k *= 2
+            k = stack.pop()
+            self._tree[k] = a_list[i]
+            self._rank[k] = i
+            i += 1
+            k = 2 * k + 1
+
+    @staticmethod
+    def _storage(a_list, size):
+        '''Return an array of size zeros fit for the keys of a_list'''
+        if isinstance(a_list, Numbers):
+            a_list = a_list.a_list
+        typecode = _buffer_typecode(a_list)
+        if typecode is not None and typecode in TYPECODES:
+            return array.array(typecode, [0]) * size
+        if all(isinstance(x, int) for x in a_list):
+            if not a_list or -2**63 <= min(a_list) and max(a_list) < 2**63:
+                return array.array('q', bytes(8 * size))
+        elif all(map(_is_double, a_list)):
+            return array.array('d', bytes(8 * size))
+        return [None] * size
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, value):
+        return self.search(value) is not None
+
+    def _descend(self, value, strict):
+        '''Return the sorted position of the first key >= (or >) value'''
+        tree, n, k = self._tree, self._n, 1
+        if strict:
+            while k <= n:
+                k = 2 * k + (tree[k] <= value)
+        else:
+            while k <= n:
+                k = 2 * k + (tree[k] < value)
+        # drop the trailing right turns and the last left one
+        k >>= (~k & (k + 1)).bit_length()
+        return self._rank[k] if k else n
+
+    def lower_bound(self, value):
+        '''Return the index of the first key not less than value.'''
+        return self._descend(value, False)
+
+    def upper_bound(self, value):
+        '''Return the index of the first key greater than value.'''
+        return self._descend(value, True)
+
+    def search(self, value):
+        '''Return the index of the first key equal to value, else None.'''
+        tree, n, k = self._tree, self._n, 1
+        while k <= n:
+            k = 2 * k + (tree[k] < value)
+        k >>= (~k & (k + 1)).bit_length()
+        if k and tree[k] == value:
+            return self._rank[k]
+        return None
+
+
+def write_index(path, a_list, typecode=None):
+    '''Write the sorted numbers of a_list to path for MappedIndex.
+
+    The file holds a 16-byte header followed by the values as a
+    fixed-width machine array. The typecode defaults to the one of an
+    array.array or the dtype of an ndarray (also inside Numbers), else
+    to 'q' for ints and 'd' otherwise. Raise InputError if a_list is not
+    sorted or the typecode is not one of TYPECODES.
+    '''
+    _require_sorted(a_list)
+    if isinstance(a_list, Numbers):
+        a_list = a_list.a_list
+    if typecode is None:
+        typecode = _buffer_typecode(a_list)
+    if typecode is None:
+        integral = all(isinstance(x, int) for x in a_list)
+        typecode = 'q' if integral else 'd'
+    if typecode not in TYPECODES:
+        raise InputError(f'Unsupported typecode {typecode!r}.')
+    values = array.array(typecode, a_list)
+    header = INDEX_HEADER.pack(INDEX_MAGIC, _BYTE_ORDER.encode(),
+                               typecode.encode(), len(values))
+    with open(path, 'wb') as f:
+        f.write(header)
+        values.tofile(f)
+
+
+class MappedIndex(object):
+    '''A sorted sequence of numbers served straight from a file.
+
+    The file written by write_index is memory-mapped read-only and its
+    values are accessed through a typed memoryview, so opening takes
+    constant time regardless of the size, nothing is deserialized and
+    the pages are shared by all the processes mapping the same file.
+    Supports len, indexing, lower_bound, upper_bound and binary_search;
+    use as a context manager or call close when done.
+    '''
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+            if len(header) < INDEX_HEADER.size:
+                raise InputError(f'{path} is not an index file.')
+            magic, order, typecode, n = INDEX_HEADER.unpack(header)
+            typecode = typecode.decode('latin-1')
+            if magic != INDEX_MAGIC or typecode not in TYPECODES:
+                raise InputError(f'{path} is not an index file.')
+            if order.decode('latin-1') != _BYTE_ORDER:
+                raise InputError(f'{path} was written with the other '
+                                 'byte order.')
+            stop = INDEX_HEADER.size + n * array.array(typecode).itemsize
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < stop:
+            self._mmap.close()
+            raise InputError(f'{path} is truncated.')
+        self._keys = memoryview(self._mmap)[INDEX_HEADER.size:stop].cast(
+            typecode)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, i):
+        return self._keys[i]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        '''Unmap the file.'''
+        self._keys.release()
+        self._mmap.close()
+
+    def lower_bound(self, value):
+        '''Return the index of the first key not less than value.'''
+        return bisect_left(self._keys, value)
+
+    def upper_bound(self, value):
+        '''Return the index of the first key greater than value.'''
+        return bisect_right(self._keys, value)
+
+    def binary_search(self, value):
+        '''Return i for which self[i] == value, else None.'''
+        return binary_search(value, self._keys, 0, len(self._keys) - 1,
+                             trusted=True)
+
+
+class SearchCache(object):
+    '''A bounded LRU memo of binary_search results.
+
+    Results are keyed by the identity and the version attribute of the
+    searched sequence (e.g. algorithms.sorter.Numbers or
+    datastructures.basic.Array), so a mutation makes all the results for
+    the sequence unreachable; they are evicted as least recently used.
+    Results of trusted searches are kept apart, so that they are never
+    returned to a search asking for the sortedness check. Sequences
+    without a version are searched without caching. hits and misses
+    count the lookups.
+    '''
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError(f'maxsize must be positive, {maxsize=} given.')
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        '''Forget all the results.'''
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = 0
+
+    def binary_search(self, value, a_list, bottom, top, trusted=False):
+        '''Return binary_search(value, a_list, bottom, top, trusted).'''
+        version = getattr(a_list, 'version', None)
+        try:
+            ref = weakref.ref(a_list)
+        except TypeError:  # a_list cannot be weakly referenced
+            version = None
+        if version is None:
+            return binary_search(value, a_list, bottom, top, trusted)
+        key = (id(a_list), version, value, bottom, top, bool(trusted))
+        with self._lock:
+            entry = self._results.get(key)
+            # the id of a collected sequence may have been reused
+            if entry is not None and entry[0]() is a_list:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        result = binary_search(value, a_list, bottom, top, trusted)
+        with self._lock:
+            self.misses += 1
+            self._results[key] = (ref, result)
+            self._results.move_to_end(key)
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
@@ -1,23 +1,176 @@
+import array
+import functools
+import heapq
+import inspect
 import math
+import operator
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, islice
+from multiprocessing import shared_memory
+
+from datastructures.trees import FenwickTree, SegmentTree
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# Sublists of at most this many elements are sorted with insertion sort
+INSERTION_THRESHOLD = 32
+
+# Lists shorter than this are not worth sending to worker processes
+PARALLEL_THRESHOLD = 1 << 16
+
+# Number of key bits handled by one pass of radix sort
+RADIX_BITS = 11
+
+# Cost of one radix sort pass measured in merge sort passes; sort picks
+# radix sort when it needs fewer passes than merge sort by this measure
+RADIX_PASS_COST = 3
+
+# array.array typecodes accepted by the typed storage mode
+TYPECODES = 'bBhHiIlLqQfd'
 
 class NumbersTypeError(TypeError): pass
 
 
+@dataclass
+class SortStats:
+	'''Counters collected by a sort call of an instrumented Numbers.
+	
+	comparisons - comparisons between elements,
+	moves - writes of elements into the list,
+	swaps - pairs of consecutive writes exchanging two elements,
+	max_depth - the deepest recursion of a single method,
+	allocations - copies (slices) of the list made while sorting,
+	allocated - the total number of elements in those copies.
+	'''
+	comparisons: int = 0
+	moves: int = 0
+	swaps: int = 0
+	max_depth: int = 0
+	allocations: int = 0
+	allocated: int = 0
+
+# SortStats of the instrumented call in progress, if any
+_active_stats = None
+
+
+def _instrumented(method):
+	'''Collect SortStats of method calls on instrumented Numbers.
+	
+	For an instrumented instance the method runs on a traced list of
+	counting proxies of the elements (so the pure-Python engine is always
+	measured), the results are written back and the counters are stored
+	in self.stats. Otherwise the method is called directly.
+	'''
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		global _active_stats
+		if not self.instrument or _active_stats is not None:
+			return method(self, *args, **kwargs)
+		stats = SortStats()
+		original = self.a_list
+		values = original.tolist() if _is_ndarray(original) else original
+		self.a_list = _TracedList(map(_counted, values))
+		depths = {}
+		
+		def profile(frame, event, arg):
+			code = frame.f_code
+			if code not in _NUMBERS_CODES:
+				return
+			if event == 'call':
+				depths[code] = depths.get(code, 0) + 1
+				stats.max_depth = max(stats.max_depth, depths[code])
+			elif event == 'return':
+				depths[code] -= 1
+		
+		previous = sys.getprofile()
+		_active_stats = stats
+		sys.setprofile(profile)
+		try:
+			result = method(self, *args, **kwargs)
+		finally:
+			sys.setprofile(previous)
+			_active_stats = None
+			traced, self.a_list = self.a_list, original
+			self._replace(map(_plain, traced))
+			self.stats = stats
+		if isinstance(result, list):
+			return list(map(_plain, result))
+		return _plain(result)
+	return wrapper
+
+
+def _mutating(method):
+	'''Bump self.version after every call of method'''
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		try:
+			return method(self, *args, **kwargs)
+		finally:
+			self.version += 1
+	return wrapper
+
+
 class Numbers(object):
-	'''Create a list-like object with int/float values only'''
+	'''Create a list-like object with int/float values only
+	
+	By default the values are kept in a plain Python list. Passing an
+	array.array, a buffer-protocol object or a typecode (e.g. 'q' for
+	int64, 'd' for double) switches to the typed storage mode, in which
+	self.a_list is an array.array and the element types are enforced by
+	its typecode instead of per-item checks. When numpy is installed a
+	one-dimensional numeric ndarray is used as is, and sorting, min/max
+	and membership tests are done by numpy.
+	
+	With instrument=True every sorting and selection call records its
+	SortStats in self.stats. Instrumentation is off by default and then
+	costs nothing but a flag check per call.
+	
+	self.version is incremented by every method modifying self.a_list, so
+	that results computed from the values (e.g. by algorithms.search) can
+	be cached. Modifying self.a_list directly is not tracked.
 	
-	def __init__(self, a_list=[]):
+	prefix_sum, range_sum, range_min and range_max answer range queries
+	in O(log n) time from a Fenwick tree and segment trees, which point
+	updates through __setitem__ and append keep in sync.
+	'''
+	
+	def __init__(self, a_list=[], typecode=None, instrument=False):
+		self.instrument = instrument
+		self.stats = None
+		self.version = 0
+		self._ranges = None
+		self._ranges_version = None
 		try:
-			self.a_list = self.validate_list(a_list)
+			if typecode is None and _is_ndarray(a_list):
+				self.a_list = self.validate_ndarray(a_list)
+			elif typecode is not None or _is_buffer(a_list):
+				self.a_list = self.validate_buffer(a_list, typecode)
+			else:
+				self.a_list = self.validate_list(a_list)
 		except NumbersTypeError:
 			raise
 	
+	@property
+	def typecode(self):
+		'''The typecode of the typed storage, None for a plain list'''
+		return getattr(self.a_list, 'typecode', None)
+	
 	def __len__(self):
 		'''Return len(self.a_list)'''
 		return len(self.a_list)
 	
 	def __contains__(self, element):
 		'''Return True if element in self.a_list, False otherwise'''
+		if _is_ndarray(self.a_list):
+			if not _is_number(element):
+				return False
+			return bool((self.a_list == element).any())
 		return element in self.a_list
 	
 	def __getitem__(self, key):
@@ -26,13 +179,26 @@ class Numbers(object):
 			raise IndexError
 		return self.a_list[key]
 	
+	@_mutating
 	def __setitem__(self, key, value):
 		'''Equivalent to self.a_list[key] = value'''
-		if not (isinstance(value, int) or isinstance(value, float)):
-			error_msg = f'List elements cannot be of type {type(value)}.'
-			raise NumbersTypeError
-		self.a_list[key] = value
+		if _is_ndarray(self.a_list):
+			self.a_list[key] = self._ndarray_item(value)
+		elif self.typecode is not None:
+			try:
+				self.a_list[key] = value
+			except (OverflowError, TypeError):
+				error_msg = f'List element {value!r} does not fit the typecode.'
+				raise NumbersTypeError(error_msg) from None
+		else:
+			if not (isinstance(value, int) or isinstance(value, float)):
+				error_msg = f'List elements cannot be of type {type(value)}.'
+				raise NumbersTypeError(error_msg)
+			self.a_list[key] = value
+		if not isinstance(key, slice):
+			self._sync_ranges(key % len(self.a_list))
 	
+	@_mutating
 	def __delitem__(self, key):
 		'''Equivalent to del self.a_list[key]'''
 		del self.a_list[key]
@@ -49,16 +215,191 @@ class Numbers(object):
 				raise NumbersTypeError(error_msg)
 		return a_list
 	
+	def validate_buffer(self, a_list, typecode=None):
+		'''Validate a_list passed to Numbers in the typed storage mode.
+		
+		An array.array with a numeric typecode is returned as is (without
+		copying) unless a different typecode is requested. bytes and
+		bytearray objects are raw memory: their bytes are reinterpreted as
+		machine values of the typecode (as array.frombytes does). Other
+		buffer-protocol objects are copied into an array.array of their own
+		format or of the given typecode value by value, and any other
+		iterable is converted element by element. Raise NumbersTypeError if
+		the typecode is not numeric or some element does not fit it.
+		'''
+		if typecode is None:
+			typecode = getattr(a_list, 'typecode', None)
+			if typecode is None:
+				typecode = memoryview(a_list).format.lstrip('@=')
+		if typecode not in TYPECODES:
+			error_msg = f'Unsupported typecode {typecode!r}.'
+			raise NumbersTypeError(error_msg)
+		if isinstance(a_list, array.array) and a_list.typecode == typecode:
+			return a_list
+		try:
+			if isinstance(a_list, array.array) or not _is_buffer(a_list):
+				return array.array(typecode, a_list)
+			view = memoryview(a_list)
+			typed = array.array(typecode)
+			if (isinstance(a_list, (bytes, bytearray))
+					or view.format.lstrip('@=') == typecode):
+				# raw bytes or the same layout, reinterpret without boxing
+				typed.frombytes(view.cast('B'))
+			else:
+				typed.extend(view.tolist())
+			return typed
+		except (OverflowError, TypeError, ValueError) as err:
+			raise NumbersTypeError(str(err)) from None
+	
+	def validate_ndarray(self, a_list):
+		'''Validate a numpy array passed to Numbers when instantiating.
+		
+		Return a_list (without copying) if it is one-dimensional and of an
+		integer or floating dtype, raise NumbersTypeError otherwise.
+		'''
+		if a_list.dtype.kind not in 'iuf':
+			error_msg = f'Array elements cannot be of dtype {a_list.dtype}.'
+			raise NumbersTypeError(error_msg)
+		if a_list.ndim != 1:
+			error_msg = f'One-dimensional array expected, got {a_list.ndim}.'
+			raise NumbersTypeError(error_msg)
+		return a_list
+	
+	def _ndarray_item(self, value):
+		'''Return value as a scalar of the dtype of self.a_list
+		
+		Raise NumbersTypeError if value is not a number, is not an integer
+		for an integer dtype or is out of the range of the dtype.
+		'''
+		dtype = self.a_list.dtype
+		if not _is_number(value) or (
+				dtype.kind in 'iu'
+				and not isinstance(value, (int, np.integer))):
+			error_msg = f'Array elements cannot be of type {type(value)}.'
+			raise NumbersTypeError(error_msg)
+		if dtype.kind in 'iu':
+			info = np.iinfo(dtype)
+			if not info.min <= value <= info.max:
+				error_msg = f'{value!r} is out of the range of {dtype}.'
+				raise NumbersTypeError(error_msg)
+			return dtype.type(value)
+		with np.errstate(over='ignore'):
+			item = dtype.type(value)
+		if np.isinf(item) and not math.isinf(value):
+			error_msg = f'{value!r} is out of the range of {dtype}.'
+			raise NumbersTypeError(error_msg)
+		return item
+	
+	def min(self):
+		'''Return the smallest element of self.a_list'''
+		if _is_ndarray(self.a_list):
+			return self.a_list.min().item()
+		return min(self.a_list)
+	
+	def max(self):
+		'''Return the largest element of self.a_list'''
+		if _is_ndarray(self.a_list):
+			return self.a_list.max().item()
+		return max(self.a_list)
+	
+	@_mutating
 	def append(self, key):
 		'''Append key to the end of the self.a_list
 		
-		Raise NumbersTypeError if type of key is other than int or float.
+		Raise NumbersTypeError if type of key is other than int or float
+		(or does not fit the typecode in the typed storage mode). Note that
+		an ndarray cannot grow in place, so appending to it copies it; its
+		dtype is kept and key must fit it.
 		'''
-		if not (isinstance(key, int) or isinstance(key, float)):
-			error_msg = f'List elements cannot be of type {type(key)}.'
-			raise NumbersTypeError(error_msg)
-		self.a_list.append(key)
+		if _is_ndarray(self.a_list):
+			item = np.array([self._ndarray_item(key)], dtype=self.a_list.dtype)
+			self.a_list = np.concatenate((self.a_list, item))
+		elif self.typecode is not None:
+			try:
+				self.a_list.append(key)
+			except (OverflowError, TypeError):
+				error_msg = f'List element {key!r} does not fit the typecode.'
+				raise NumbersTypeError(error_msg) from None
+		else:
+			if not (isinstance(key, int) or isinstance(key, float)):
+				error_msg = f'List elements cannot be of type {type(key)}.'
+				raise NumbersTypeError(error_msg)
+			self.a_list.append(key)
+		self._sync_ranges(len(self.a_list) - 1)
+	
+	def prefix_sum(self, i):
+		'''Return sum(self.a_list[:i]) in O(log n) time
+		
+		This and the other range queries are answered by an index built on
+		the first query (see _range_index) and kept in sync by __setitem__
+		and append; any other modification makes the next query rebuild it.
+		Raise IndexError unless 0 <= i <= len(self).
+		'''
+		return self._range_index()[0].prefix_sum(i)
+	
+	def range_sum(self, lo, hi):
+		'''Return sum(self.a_list[lo:hi]) in O(log n) time
+		
+		Raise IndexError unless 0 <= lo <= hi <= len(self).
+		'''
+		return self._range_index()[0].range_sum(lo, hi)
+	
+	def range_min(self, lo, hi):
+		'''Return min(self.a_list[lo:hi]) in O(log n) time
+		
+		Raise IndexError unless 0 <= lo <= hi <= len(self) and ValueError
+		if the range is empty.
+		'''
+		if lo == hi:
+			raise ValueError('range_min() of an empty range')
+		return self._range_index()[1].query(lo, hi)
+	
+	def range_max(self, lo, hi):
+		'''Return max(self.a_list[lo:hi]) in O(log n) time
+		
+		Raise IndexError unless 0 <= lo <= hi <= len(self) and ValueError
+		if the range is empty.
+		'''
+		if lo == hi:
+			raise ValueError('range_max() of an empty range')
+		return self._range_index()[2].query(lo, hi)
+	
+	def _range_index(self):
+		'''Return the (sums, minima, maxima) trees of self.a_list
+		
+		The trees are rebuilt in O(n) time if self.a_list was modified since
+		they were built or last updated.
+		'''
+		if self._ranges is None or self._ranges_version != self.version:
+			values = self.a_list
+			if _is_ndarray(values) or self.typecode is not None:
+				values = values.tolist()
+			self._ranges = (FenwickTree(values),
+							SegmentTree(values, min, math.inf),
+							SegmentTree(values, max, -math.inf))
+			self._ranges_version = self.version
+		return self._ranges
+	
+	def _sync_ranges(self, i):
+		'''Apply the new value at position i to a current range index
+		
+		Called by the point updates before _mutating bumps self.version, so
+		the index is marked current for the version they leave behind.
+		'''
+		if self._ranges is None or self._ranges_version != self.version:
+			return
+		value = self.a_list[i]
+		if _is_ndarray(self.a_list):
+			value = value.item()
+		for tree in self._ranges:
+			if i == len(tree):
+				tree.append(value)
+			else:
+				tree.update(i, value)
+		self._ranges_version = self.version + 1
 
+	@_mutating
+	@_instrumented
 	def bubble(self):
 		'''Sort self.a_list using a bubble sort algorithm'''
 		for i in range(len(self.a_list)):
@@ -67,6 +408,8 @@ class Numbers(object):
 					self.a_list[j], self.a_list[j+1] = self.a_list[j+1], \
                 		self.a_list[j]
 	
+	@_mutating
+	@_instrumented
 	def insertion(self):
 		'''Sort self.a_list using an insertion sort algorithm'''
 		for j in range(1, len(self.a_list)):
@@ -78,6 +421,8 @@ class Numbers(object):
 				i -= 1
 			self.a_list[i+1] = key
 	
+	@_mutating
+	@_instrumented
 	def insertion_sort_r(self):
 		'''Sort self.a_list using a recursive insertion sort algorighm.
 		'''
@@ -100,12 +445,20 @@ class Numbers(object):
 		a_list[j+1] = key
 
 	
+	@_mutating
+	@_instrumented
 	def selection(self):
 		'''Sort self.a_list using a selection sort algorithm'''
-		for i in range(len(self.a_list)-1):
-			# key - i is the index of the smallest element of self.a_list[i:]
-			key = self.a_list[i:].index(min(self.a_list[i:])) + i
-			self.a_list[i], self.a_list[key] = self.a_list[key], self.a_list[i]
+		a_list = self.a_list
+		n = len(a_list)
+		for i in range(n-1):
+			# key is the index of the smallest element of a_list[i:], found
+			# in a single scan without copying the tail
+			if _is_ndarray(a_list):
+				key = int(a_list[i:].argmin()) + i
+			else:
+				key = min(range(i, n), key=a_list.__getitem__)
+			a_list[i], a_list[key] = a_list[key], a_list[i]
 	
 	@staticmethod
 	def merge(a_list, p, q, r):
@@ -114,6 +467,9 @@ class Numbers(object):
 		n_R = r - q # length of a_list[q+1:r+1]
 		L = a_list[p:q+1]
 		R = a_list[q+1:r+1]
+		if _is_ndarray(a_list):
+			# numpy slices are views, the merge needs copies
+			L, R = L.copy(), R.copy()
 		i = 0 # i indexes the smallest remaining element in L
 		j = 0 # j indexes the smallest remaining element in R
 		k = p # k indexes the location in a_list to fill
@@ -140,9 +496,14 @@ class Numbers(object):
 			j += 1
 			k += 1
 	
+	@_mutating
+	@_instrumented
 	def merge_sort(self):
 		'''Sort self.a_list using merge sort algorithm'''
-		n = self.a_list.index(self.a_list[-1])
+		if _is_ndarray(self.a_list):
+			self.a_list.sort(kind='mergesort')
+			return
+		n = len(self.a_list) - 1
 		self._merge_sort(self.a_list, 0, n)
 	
 	def _merge_sort(self, a_list, p, r):
@@ -154,4 +515,601 @@ class Numbers(object):
 		q = math.floor((p+r)/2)
 		self._merge_sort(a_list, p, q)
 		self._merge_sort(a_list, q+1, r)
-		self.merge(a_list, p, q, r)
\ No newline at end of file
+		self.merge(a_list, p, q, r)
+	
+	@_mutating
+	@_instrumented
+	def merge_sort_bu(self):
+		'''Sort self.a_list using a bottom-up natural merge sort.
+		
+		The list is first split into natural runs (non-decreasing ones, and
+		strictly decreasing ones which are reversed in place); runs shorter
+		than INSERTION_THRESHOLD are extended with insertion sort. Then the
+		runs are merged pairwise, pass after pass, alternating between
+		self.a_list and a single auxiliary buffer of the same size, so no
+		other memory is allocated and no recursion is involved.
+		'''
+		if _is_ndarray(self.a_list):
+			self.a_list.sort(kind='mergesort')
+			return
+		self._merge_sort_bu(self.a_list)
+	
+	def _merge_sort_bu(self, a_list):
+		'''A method that does the actual job of sorting.
+		
+		Is called by merge_sort_bu and sort methods.'''
+		n = len(a_list)
+		if n < 2:
+			return
+		runs = self._natural_runs(a_list)
+		if len(runs) == 2:
+			return
+		src, dst = a_list, a_list[:]
+		while len(runs) > 2:
+			merged = []
+			for k in range(0, len(runs) - 1, 2):
+				p = runs[k]
+				if k + 2 < len(runs):
+					self._merge_into(src, dst, p, runs[k+1], runs[k+2])
+				else:
+					# odd run out, carry it over to the next pass
+					for i in range(p, n):
+						dst[i] = src[i]
+				merged.append(p)
+			merged.append(n)
+			runs = merged
+			src, dst = dst, src
+		if src is not a_list:
+			a_list[:] = src
+	
+	def _natural_runs(self, a_list):
+		'''Return the boundaries of the sorted runs of a_list.
+		
+		Strictly decreasing runs are reversed in place and runs shorter
+		than INSERTION_THRESHOLD are extended using insertion sort. The
+		returned list starts with 0, ends with len(a_list) and run k is
+		a_list[runs[k]:runs[k+1]].
+		'''
+		n = len(a_list)
+		runs = []
+		p = 0
+		while p < n:
+			r = p + 1
+			if r < n and a_list[r] < a_list[p]:
+				while r < n and a_list[r] < a_list[r-1]:
+					r += 1
+				i, j = p, r - 1
+				while i < j:
+					a_list[i], a_list[j] = a_list[j], a_list[i]
+					i += 1
+					j -= 1
+			else:
+				while r < n and a_list[r] >= a_list[r-1]:
+					r += 1
+			if r - p < INSERTION_THRESHOLD and r < n:
+				r = min(p + INSERTION_THRESHOLD, n)
+				self._insertion_range(a_list, p, r-1)
+			runs.append(p)
+			p = r
+		runs.append(n)
+		return runs
+	
+	@staticmethod
+	def _merge_into(src, dst, p, q, r):
+		'''Merge sorted src[p:q] and src[q:r] into dst[p:r]'''
+		i, j, k = p, q, p
+		if src[q-1] > src[q]:
+			# keep the current heads in locals to halve the subscriptions
+			x, y = src[i], src[j]
+			while True:
+				if x <= y:
+					dst[k] = x
+					k += 1
+					i += 1
+					if i == q:
+						break
+					x = src[i]
+				else:
+					dst[k] = y
+					k += 1
+					j += 1
+					if j == r:
+						break
+					y = src[j]
+		# at most one of the runs has elements left, copy them over
+		while i < q:
+			dst[k] = src[i]
+			i += 1
+			k += 1
+		while j < r:
+			dst[k] = src[j]
+			j += 1
+			k += 1
+	
+	@_mutating
+	@_instrumented
+	def radix_sort(self):
+		'''Sort self.a_list using an LSD radix sort.
+		
+		Every value is mapped to a nonnegative integer key preserving the
+		order: ints are shifted by the minimum, floats are reinterpreted as
+		their IEEE-754 bits with the sign bit flipped for positive values
+		and all bits flipped for negative ones (so that -0.0 comes before
+		0.0). The keys are then distributed into 2**RADIX_BITS buckets,
+		RADIX_BITS at a time starting from the least significant ones, so
+		the number of passes depends only on the range of the values. The
+		sort is stable. Lists mixing ints and floats are sorted by merge
+		sort instead.
+		'''
+		if _is_ndarray(self.a_list):
+			self.a_list.sort(kind='stable')
+			return
+		bounds = self._radix_bounds()
+		if bounds is None:
+			self._merge_sort_bu(self.a_list)
+			return
+		self._radix_sort(self._radix_keys(bounds[0]))
+	
+	def _radix_bounds(self):
+		'''Return the smallest and the largest radix key of self.a_list.
+		
+		Only the minimum and the maximum of the values are mapped to keys,
+		nothing of the size of self.a_list is allocated. Return None if
+		self.a_list mixes ints and floats.
+		'''
+		a_list = self.a_list
+		typecode = self.typecode
+		if not a_list:
+			return 0, 0
+		if typecode is None:
+			if all(isinstance(item, int) for item in a_list):
+				return min(a_list), max(a_list)
+			if not all(isinstance(item, float) for item in a_list):
+				return None
+		elif typecode not in 'fd':
+			return min(a_list), max(a_list)
+		# the two zeros compare equal but -0.0 has the smaller key
+		low, high = min(a_list), max(a_list)
+		return (_float_key(-0.0 if low == 0 else low),
+			_float_key(0.0 if high == 0 else high))
+	
+	def _radix_keys(self, low):
+		'''Return the order-preserving keys of self.a_list minus low.
+		
+		The keys are ints shifted by low for ints, and for floats their
+		IEEE-754 bits with the sign bit flipped for positive values and all
+		bits flipped for negative ones. They are kept in an array.array('Q')
+		unless some does not fit 64 bits.
+		'''
+		a_list = self.a_list
+		if not a_list:
+			return array.array('Q')
+		if self.typecode in ('f', 'd') or isinstance(a_list[0], float):
+			keys = array.array('Q', array.array('d', a_list).tobytes())
+			sign = 1 << 63
+			mask = (1 << 64) - 1
+			for i, bits in enumerate(keys):
+				keys[i] = (bits ^ mask if bits & sign else bits | sign) - low
+			return keys
+		try:
+			return array.array('Q', (item - low for item in a_list))
+		except OverflowError:
+			return [item - low for item in a_list]
+	
+	def _radix_sort(self, keys):
+		'''Reorder self.a_list by LSD radix sort on the nonnegative keys'''
+		a_list = self.a_list
+		span = max(keys, default=0)
+		mask = (1 << RADIX_BITS) - 1
+		order = range(len(keys))
+		shift = 0
+		while span >> shift:
+			buckets = [[] for _ in range(mask + 1)]
+			for i in order:
+				buckets[(keys[i] >> shift) & mask].append(i)
+			order = list(chain.from_iterable(buckets))
+			shift += RADIX_BITS
+		self._replace([a_list[i] for i in order])
+	
+	@_mutating
+	@_instrumented
+	def sort(self):
+		'''Sort self.a_list choosing the algorithm at runtime.
+		
+		Already sorted input is left untouched. Otherwise, when all the
+		values are ints or all are floats and their range is small enough
+		for radix sort to need fewer passes than merge sort (weighted by
+		RADIX_PASS_COST), radix_sort is used. In any other case the input
+		is scanned for natural runs, so strictly decreasing input is
+		reversed in place in a single pass; short runs are sorted with
+		insertion sort and then merged bottom-up (see merge_sort_bu). The
+		sort is stable and runs in O(n log n) time in the worst case. A
+		numpy array is sorted by numpy's own stable sort.
+		'''
+		a_list = self.a_list
+		if _is_ndarray(a_list):
+			a_list.sort(kind='stable')
+			return
+		n = len(a_list)
+		if all(map(operator.le, a_list, islice(a_list, 1, None))):
+			return
+		if n > INSERTION_THRESHOLD:
+			# decide from the bounds alone, the keys cost memory
+			bounds = self._radix_bounds()
+			if bounds is not None:
+				low, high = bounds
+				passes = -(-(high - low).bit_length() // RADIX_BITS)
+				if (high - low < 1 << 64 and passes * RADIX_PASS_COST
+						< math.log2(n / INSERTION_THRESHOLD)):
+					self._radix_sort(self._radix_keys(low))
+					return
+		self._merge_sort_bu(a_list)
+	
+	@_instrumented
+	def nsmallest(self, k):
+		'''Return a sorted list of the k smallest elements of self.a_list
+		
+		A heap of at most k elements is kept while scanning self.a_list,
+		which takes O(n log k) time; self.a_list is not modified.
+		'''
+		a_list = self.a_list
+		if _is_ndarray(a_list):
+			k = max(0, min(k, len(a_list)))
+			if k == 0:
+				return []
+			smallest = np.partition(a_list, k-1)[:k]
+			smallest.sort()
+			return smallest.tolist()
+		return heapq.nsmallest(k, a_list)
+	
+	@_instrumented
+	def nlargest(self, k):
+		'''Return a list of the k largest elements of self.a_list
+		
+		The list is sorted in decreasing order. See nsmallest.
+		'''
+		a_list = self.a_list
+		if _is_ndarray(a_list):
+			n = len(a_list)
+			k = max(0, min(k, n))
+			if k == 0:
+				return []
+			largest = np.partition(a_list, n-k)[n-k:]
+			largest.sort()
+			return largest[::-1].tolist()
+		return heapq.nlargest(k, a_list)
+	
+	@_mutating
+	@_instrumented
+	def nth_element(self, k):
+		'''Rearrange self.a_list around its k-th smallest element.
+		
+		After the call self.a_list[k] is the element that would be there
+		if self.a_list was sorted, no element before it is greater and no
+		element after it is smaller. Return self.a_list[k]. The selection
+		is done by introselect: quickselect with a median-of-three pivot,
+		which switches to the median-of-medians pivot when the partitions
+		stop shrinking, so it runs in O(n) time in the worst case.
+		'''
+		a_list = self.a_list
+		n = len(a_list)
+		if k < 0:
+			k += n
+		if not 0 <= k < n:
+			raise IndexError
+		if _is_ndarray(a_list):
+			a_list.partition(k)
+		else:
+			self._select(a_list, k, 0, n-1)
+		return a_list[k]
+	
+	@_mutating
+	@_instrumented
+	def partial_sort(self, k):
+		'''Sort the k smallest elements into self.a_list[:k].
+		
+		The order of the remaining elements is unspecified.
+		'''
+		a_list = self.a_list
+		n = len(a_list)
+		if k >= n:
+			self.sort()
+			return
+		if k <= 0:
+			return
+		if _is_ndarray(a_list):
+			a_list.partition(k-1)
+			a_list[:k].sort()
+			return
+		self._select(a_list, k-1, 0, n-1)
+		head = Numbers(a_list[:k])
+		head.sort()
+		a_list[:k] = head.a_list
+	
+	def _select(self, a_list, k, p, r):
+		'''Move the k-th smallest element of a_list[p:r+1] to a_list[k].
+		
+		Is called by nth_element and partial_sort methods.'''
+		# quickselect gets 2 log n rounds before median of medians takes over
+		budget = 2 * (r - p + 1).bit_length()
+		while r - p >= INSERTION_THRESHOLD:
+			if budget > 0:
+				budget -= 1
+				x, y, z = a_list[p], a_list[(p + r) // 2], a_list[r]
+				pivot = sorted((x, y, z))[1]
+			else:
+				pivot = self._median_of_medians(a_list, p, r)
+			lt, gt = self._partition3(a_list, p, r, pivot)
+			if k < lt:
+				r = lt - 1
+			elif k > gt:
+				p = gt + 1
+			else:
+				return
+		self._insertion_range(a_list, p, r)
+	
+	@staticmethod
+	def _partition3(a_list, p, r, pivot):
+		'''Partition a_list[p:r+1] into <, == and > pivot parts.
+		
+		Return (lt, gt) such that a_list[p:lt] < pivot,
+		a_list[lt:gt+1] == pivot and a_list[gt+1:r+1] > pivot.
+		'''
+		lt, i, gt = p, p, r
+		while i <= gt:
+			x = a_list[i]
+			if x < pivot:
+				a_list[lt], a_list[i] = x, a_list[lt]
+				lt += 1
+				i += 1
+			elif x > pivot:
+				a_list[gt], a_list[i] = x, a_list[gt]
+				gt -= 1
+			else:
+				i += 1
+		return lt, gt
+	
+	def _median_of_medians(self, a_list, p, r):
+		'''Return the median of the medians of five of a_list[p:r+1]'''
+		medians = []
+		for i in range(p, r+1, 5):
+			j = min(i + 4, r)
+			self._insertion_range(a_list, i, j)
+			medians.append(a_list[(i + j) // 2])
+		k = len(medians) // 2
+		self._select(medians, k, 0, len(medians)-1)
+		return medians[k]
+	
+	@_mutating
+	@_instrumented
+	def parallel_sort(self, workers=None):
+		'''Sort self.a_list using several processes.
+		
+		The values are copied once into a multiprocessing.shared_memory
+		block, which is split into one chunk per worker. Every chunk is
+		sorted in a separate process with the sort method, and the sorted
+		chunks are k-way merged back into self.a_list. Nothing is pickled
+		but the chunk boundaries.
+		
+		The number of workers defaults to os.cpu_count(). Lists shorter than
+		PARALLEL_THRESHOLD, a single worker and plain lists not made only of
+		ints or only of floats (e.g. mixing them, or holding bools, which
+		would come back as ints) fall back to sort.
+		The SortStats of an instrumented instance miss the comparisons,
+		which are made on the raw shared values.
+		'''
+		if workers is None:
+			workers = os.cpu_count() or 1
+		if workers < 1:
+			raise ValueError(f'At least one worker expected, {workers=} given.')
+		n = len(self.a_list)
+		shared = None
+		if workers > 1 and n >= PARALLEL_THRESHOLD:
+			shared = self._shared_array()
+		if shared is None:
+			self.sort()
+			return
+		typecode = shared.typecode
+		nbytes = n * shared.itemsize
+		shm = shared_memory.SharedMemory(create=True, size=nbytes)
+		try:
+			shm.buf[:nbytes] = memoryview(shared).cast('B')
+			del shared
+			size = -(-n // workers)
+			bounds = [(p, min(p + size, n)) for p in range(0, n, size)]
+			with ProcessPoolExecutor(max_workers=len(bounds)) as pool:
+				list(pool.map(_sort_shared_chunk,
+					[shm.name] * len(bounds), [typecode] * len(bounds),
+					*zip(*bounds)))
+			view = shm.buf[:nbytes].cast(typecode)
+			try:
+				runs = [view[p:r] for p, r in bounds]
+				self._replace(heapq.merge(*runs))
+				for run in runs:
+					run.release()
+			finally:
+				view.release()
+		finally:
+			shm.close()
+			shm.unlink()
+	
+	def _shared_array(self):
+		'''Return the values of self.a_list as an array.array.
+		
+		Return None if there is no typecode able to hold them unchanged.
+		'''
+		a_list = self.a_list
+		if isinstance(a_list, array.array):
+			return a_list
+		if _is_ndarray(a_list):
+			if a_list.dtype.char not in TYPECODES:
+				return None
+			typed = array.array(a_list.dtype.char)
+			typed.frombytes(np.ascontiguousarray(a_list).tobytes())
+			return typed
+		# exact types only: bools and other subclasses would come back as
+		# plain ints or floats
+		types = set(map(type, a_list))
+		if types == {float}:
+			return array.array('d', a_list)
+		if types != {int}:
+			return None
+		try:
+			return array.array('q', a_list)
+		except OverflowError:
+			return None
+	
+	def _replace(self, values):
+		'''Overwrite self.a_list in place with len(self) values'''
+		a_list = self.a_list
+		if _is_ndarray(a_list):
+			a_list[:] = np.fromiter(values, a_list.dtype, len(a_list))
+		elif isinstance(a_list, array.array):
+			a_list[:] = array.array(a_list.typecode, values)
+		else:
+			a_list[:] = values
+	
+	@staticmethod
+	def _insertion_range(a_list, p, r):
+		'''Sort a_list[p:r+1] in place using insertion sort'''
+		for j in range(p+1, r+1):
+			key = a_list[j]
+			i = j - 1
+			while i >= p and a_list[i] > key:
+				a_list[i+1] = a_list[i]
+				i -= 1
+			a_list[i+1] = key
+
+
+def _float_key(value):
+	'''Return the radix key of the float value (see Numbers._radix_keys)'''
+	bits = array.array('Q', array.array('d', [value]).tobytes())[0]
+	return bits ^ ((1 << 64) - 1) if bits >> 63 else bits | (1 << 63)
+
+
+def _is_buffer(obj):
+	'''Return True if obj supports the buffer protocol'''
+	try:
+		memoryview(obj)
+	except TypeError:
+		return False
+	return True
+
+
+def _is_ndarray(obj):
+	'''Return True if numpy is available and obj is an ndarray'''
+	return np is not None and isinstance(obj, np.ndarray)
+
+
+def _is_number(value):
+	'''Return True if value is an int or float (numpy scalars included)'''
+	if isinstance(value, (int, float)):
+		return True
+	return np is not None and isinstance(value, (np.integer, np.floating))
+
+
+def _sort_shared_chunk(name, typecode, p, r):
+	'''Sort the items p to r-1 of the shared memory block called name.
+	
+	This function runs in the worker processes of Numbers.parallel_sort.
+	'''
+	shm = shared_memory.SharedMemory(name=name)
+	try:
+		chunk = array.array(typecode)
+		start, stop = p * chunk.itemsize, r * chunk.itemsize
+		chunk.frombytes(shm.buf[start:stop])
+		Numbers(chunk).sort()
+		shm.buf[start:stop] = memoryview(chunk).cast('B')
+	finally:
+		shm.close()
+
+
+def _plain(value):
+	'''Return the int or float wrapped by a counting proxy'''
+	if type(value) is _CountedInt:
+		return int(value)
+	if type(value) is _CountedFloat:
+		return float(value)
+	return value
+
+
+def _counted(value):
+	'''Wrap value into a counting proxy'''
+	if isinstance(value, float):
+		return _CountedFloat(value)
+	return _CountedInt(value)
+
+
+def _comparison(op):
+	'''Return a rich comparison method counting its calls'''
+	def compare(self, other):
+		_active_stats.comparisons += 1
+		return op(_plain(self), _plain(other))
+	return compare
+
+
+class _CountedInt(int):
+	'''An int counting the comparisons it takes part in'''
+	__slots__ = ()
+	__lt__ = _comparison(operator.lt)
+	__le__ = _comparison(operator.le)
+	__gt__ = _comparison(operator.gt)
+	__ge__ = _comparison(operator.ge)
+	__eq__ = _comparison(operator.eq)
+	__ne__ = _comparison(operator.ne)
+	__hash__ = int.__hash__
+
+
+class _CountedFloat(float):
+	'''A float counting the comparisons it takes part in'''
+	__slots__ = ()
+	__lt__ = _comparison(operator.lt)
+	__le__ = _comparison(operator.le)
+	__gt__ = _comparison(operator.gt)
+	__ge__ = _comparison(operator.ge)
+	__eq__ = _comparison(operator.eq)
+	__ne__ = _comparison(operator.ne)
+	__hash__ = float.__hash__
+
+
+class _TracedList(list):
+	'''A list counting the moves, swaps and copies made on it'''
+	__slots__ = ('_last',)
+	
+	def __init__(self, iterable=()):
+		super().__init__(iterable)
+		# the element displaced and the one written by the last write
+		self._last = None
+	
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			copy = list.__getitem__(self, key)
+			_active_stats.allocations += 1
+			_active_stats.allocated += len(copy)
+			return _TracedList(copy)
+		return list.__getitem__(self, key)
+	
+	def __setitem__(self, key, value):
+		if isinstance(key, slice):
+			value = list(value)
+			_active_stats.moves += len(value)
+			self._last = None
+			list.__setitem__(self, key, value)
+			return
+		_active_stats.moves += 1
+		old = list.__getitem__(self, key)
+		last = self._last
+		if last is not None and last[0] is value and last[1] is old:
+			# the second write of a[i], a[j] = a[j], a[i]
+			_active_stats.swaps += 1
+			self._last = None
+		else:
+			self._last = (old, value)
+		list.__setitem__(self, key, value)
+
+
+# code objects of the methods whose recursion depth is tracked
+_NUMBERS_CODES = frozenset(
+	inspect.unwrap(getattr(member, '__func__', member)).__code__
+	for member in vars(Numbers).values()
+	if hasattr(getattr(member, '__func__', member), '__code__'))
@@ -10,7 +10,7 @@ type.
 from abc import ABC, abstractmethod
 from collections.abc import Sequence, MutableSequence
 from typing import Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class List(ABC):
@@ -113,6 +113,14 @@ class Array(List):
     IndexError
         When methods are called with inappropriate values.
 
+    Attributes
+    ----------
+    version : int
+        Incremented by every call of `insert`, `delete` and `makenull`,
+        so that results computed from the array (e.g. cached searches)
+        can be recognized as stale. Assigning to `elements` directly
+        bypasses the counter.
+
     Notes
     -----
     Array is an implementation of the abstract data type List defined in
@@ -131,12 +139,13 @@ class Array(List):
     elements: MutableSequence[Any]
     last: int
     maxlength: int
+    version: int = field(default=0, compare=False, repr=False)
 
     def __init__(self,
                  elements: MutableSequence[Any] | None = None,
                  last: int | None = None,
                  maxlength: int | None = None) -> None:
-
+        self.version = 0
         if elements is None and last is None and maxlength is None:
             self.elements = []
             self.last = -1
@@ -218,6 +227,24 @@ class Array(List):
                 self.elements = (list(elements)
                                  + list(range(maxlength-len(elements))))
 
+    def __len__(self) -> int:
+        """Return the number of elements, `last` + 1."""
+        return self.last + 1
+
+    def __getitem__(self, p: int) -> Any:
+        """Return the element at position `p`, like `retrieve`.
+
+        Together with `__len__` this makes the array a read-only
+        sequence, e.g. for ``algorithms.search``.
+
+        Raises
+        ------
+        IndexError
+            If `p` is out of range, 0 <= p <= n, where n is the last
+            position in the array.
+        """
+        return self.retrieve(p)
+
     def end(self) -> int:
         """Return the position following the last position.
 
@@ -275,6 +302,7 @@ class Array(List):
             self.elements[q+1] = self.elements[q]
         self.last += 1
         self.elements[p] = x
+        self.version += 1
 
     def locate(self, x: Any) -> int:
         """Return the position of the given element.
@@ -349,6 +377,7 @@ class Array(List):
         self.last -= 1
         for q in range(p, self.last+1):
             self.elements[q] = self.elements[q+1]
+        self.version += 1
 
     def next(self, p: int) -> int:
         """Return the position following the given position.
@@ -425,6 +454,7 @@ class Array(List):
         """
         end = self.end()
         self.last = -1
+        self.version += 1
         return end
 
     def first(self) -> int:
@@ -481,6 +511,13 @@ class SLinkedList(List):
     IndexError
         When methods are called with invalid position argument.
 
+    Attributes
+    ----------
+    version : int
+        Incremented by every call of `insert`, `delete` and `makenull`,
+        so that results computed from the list can be recognized as
+        stale.
+
     Notes
     -----
     The benefits of using singly-linked lists over arrays are the
@@ -495,9 +532,11 @@ class SLinkedList(List):
     structures and algorithms", Addison-Wesley, 1983.
     """
     head: Node
+    version: int = field(default=0, compare=False, repr=False)
 
     def __init__(self, elements: Sequence[Any] | None = None):
         self.head = Node(None, None)
+        self.version = 0
         if elements:
             next_node = self.head
             for element in elements:
@@ -564,6 +603,7 @@ class SLinkedList(List):
             assert node is not None
             temp = node
             node.nxt = Node(element=x, nxt=temp.nxt)
+            self.version += 1
         else:
             raise IndexError("Position out of range.")
 
@@ -643,6 +683,7 @@ class SLinkedList(List):
             assert previous_node is not None
             if i == p:
                 previous_node.nxt = current_node.nxt
+                self.version += 1
                 return
             i += 1
             previous_node = previous_node.nxt
@@ -721,6 +762,7 @@ class SLinkedList(List):
         """
         end = self.end()
         self.head = Node()
+        self.version += 1
         return end
 
     def first(self) -> int:
@@ -0,0 +1,283 @@
+"""
+
+``datastructures.trees``
+========================
+
+Implicit trees stored in flat lists for range queries over a sequence
+of numbers: ``FenwickTree`` (binary indexed tree) for prefix and range
+sums and ``SegmentTree`` for range aggregates under an associative
+operation such as ``min`` or ``max``. Both answer a query and apply a
+point update or an append in O(log n) time.
+"""
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class FenwickTree:
+    """Create a Fenwick tree of the given values.
+
+    Parameters
+    ----------
+    values : Sequence[int | float], default ()
+        The values to be summed. They are copied, the tree is built in
+        O(n) time.
+
+    Raises
+    ------
+    IndexError
+        When methods are called with positions out of range.
+
+    Notes
+    -----
+    The tree is the array described in [1]_: the 1-based entry i holds
+    the sum of the i & -i values ending at position i, so a prefix sum
+    adds up at most log2(n) entries and an update changes as many. The
+    values themselves are kept as well, so that `update` can be given the
+    new value rather than the difference. An update adds the difference
+    to the integer entries; any other entry is recomputed from its value
+    and the entries it covers, in O(log n) time, as adding differences
+    would accumulate rounding errors (or turn an infinity into nan).
+    With floats, range sums are differences of prefix sums and so are
+    subject to cancellation.
+
+    References
+    ----------
+    .. [1] Peter M. Fenwick, "A new data structure for cumulative
+    frequency tables", Software: Practice and Experience 24(3), 1994.
+    """
+    values: list[int | float]
+    tree: list[int | float]
+
+    def __init__(self, values: Sequence[int | float] = ()) -> None:
+        self.values = list(values)
+        n = len(self.values)
+        self.tree = [0] + self.values
+        for i in range(1, n+1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def prefix_sum(self, i: int) -> int | float:
+        """Return the sum of the first `i` values.
+
+        Parameters
+        ----------
+        i : int
+            The number of values summed, 0 <= `i` <= n.
+
+        Returns
+        -------
+        int or float
+
+        Raises
+        ------
+        IndexError
+            If `i` is out of range.
+        """
+        if not 0 <= i <= len(self.values):
+            raise IndexError(f"Position {i=} is out of range.")
+        tree, total = self.tree, 0
+        while i:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def range_sum(self, lo: int, hi: int) -> int | float:
+        """Return the sum of values[lo:hi].
+
+        Parameters
+        ----------
+        lo, hi : int
+            The bounds of the half-open range, 0 <= `lo` <= `hi` <= n.
+
+        Returns
+        -------
+        int or float
+
+        Raises
+        ------
+        IndexError
+            If the range is invalid.
+        """
+        if lo > hi:
+            raise IndexError(f"Invalid range {lo=}, {hi=}.")
+        return self.prefix_sum(hi) - self.prefix_sum(lo)
+
+    def update(self, i: int, value: int | float) -> None:
+        """Replace the value at position `i` with `value`.
+
+        Parameters
+        ----------
+        i : int
+            The position, 0 <= `i` < n.
+        value : int or float
+
+        Raises
+        ------
+        IndexError
+            If `i` is out of range.
+        """
+        if not 0 <= i < len(self.values):
+            raise IndexError(f"Position {i=} is out of range.")
+        delta = value - self.values[i]
+        self.values[i] = value
+        tree, n = self.tree, len(self.values)
+        i += 1
+        while i <= n:
+            if type(delta) is int and type(tree[i]) is int:
+                tree[i] += delta
+            else:
+                tree[i] = self._node(i)
+            i += i & -i
+
+    def append(self, value: int | float) -> None:
+        """Append `value` to the end of the values.
+
+        The new entry covers the values from position n + 1 - (m & -m)
+        to the new one, where m = n + 1, and its sum is computed from the
+        entries it covers.
+        """
+        self.values.append(value)
+        self.tree.append(0)
+        self.tree[-1] = self._node(len(self.values))
+
+    def _node(self, i: int) -> int | float:
+        """Return the 1-based entry `i` recomputed from the entries below.
+
+        The value at `i` and the entries it covers are added in the order
+        of the construction, so the result matches a rebuilt tree.
+        """
+        tree, low = self.tree, i - (i & -i)
+        children, child = [], i - 1
+        while child > low:
+            children.append(child)
+            child &= child - 1
+        total = self.values[i-1]
+        for child in reversed(children):
+            total += tree[child]
+        return total
+
+
+@dataclass
+class SegmentTree:
+    """Create a segment tree of the given values.
+
+    Parameters
+    ----------
+    values : Sequence[Any], default ()
+        The values to be aggregated.
+    op : Callable[[Any, Any], Any], default min
+        An associative binary operation, e.g. `min`, `max` or
+        `operator.add`.
+    identity : Any, default float('inf')
+        The identity element of `op`; it is the result of a query of an
+        empty range. Use float('-inf') with `max` and 0 with addition.
+
+    Raises
+    ------
+    IndexError
+        When methods are called with positions out of range.
+
+    Notes
+    -----
+    The tree is stored bottom-up in a list of twice the capacity, a power
+    of two: the leaves are at positions capacity + i and the node k
+    aggregates its children 2k and 2k + 1. Queries combine O(log n)
+    nodes without recursion. Appending beyond the capacity doubles it and
+    rebuilds the tree, which is O(1) amortized per append.
+    """
+    op: Callable[[Any, Any], Any]
+    identity: Any
+    n: int
+    capacity: int
+    tree: list[Any]
+
+    def __init__(self,
+                 values: Sequence[Any] = (),
+                 op: Callable[[Any, Any], Any] = min,
+                 identity: Any = float('inf')) -> None:
+        self.op = op
+        self.identity = identity
+        self._build(list(values), 1)
+
+    def _build(self, values: list[Any], capacity: int) -> None:
+        """Rebuild the tree from `values` with at least `capacity` leaves."""
+        self.n = len(values)
+        while capacity < self.n:
+            capacity *= 2
+        self.capacity = capacity
+        op, tree = self.op, [self.identity] * (2 * capacity)
+        tree[capacity:capacity+self.n] = values
+        for k in range(capacity-1, 0, -1):
+            tree[k] = op(tree[2*k], tree[2*k+1])
+        self.tree = tree
+
+    def __len__(self) -> int:
+        return self.n
+
+    def query(self, lo: int, hi: int) -> Any:
+        """Return the aggregate of values[lo:hi].
+
+        Parameters
+        ----------
+        lo, hi : int
+            The bounds of the half-open range, 0 <= `lo` <= `hi` <= n.
+
+        Returns
+        -------
+        Any
+            The values in the range combined with `op` in their order,
+            `identity` if the range is empty.
+
+        Raises
+        ------
+        IndexError
+            If the range is invalid.
+        """
+        if not 0 <= lo <= hi <= self.n:
+            raise IndexError(f"Invalid range {lo=}, {hi=}.")
+        op, tree = self.op, self.tree
+        left = right = self.identity
+        lo += self.capacity
+        hi += self.capacity
+        while lo < hi:
+            if lo & 1:
+                left = op(left, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = op(tree[hi], right)
+            lo >>= 1
+            hi >>= 1
+        return op(left, right)
+
+    def update(self, i: int, value: Any) -> None:
+        """Replace the value at position `i` with `value`.
+
+        Raises
+        ------
+        IndexError
+            If `i` is out of range, 0 <= `i` < n.
+        """
+        if not 0 <= i < self.n:
+            raise IndexError(f"Position {i=} is out of range.")
+        op, tree = self.op, self.tree
+        k = i + self.capacity
+        tree[k] = value
+        k >>= 1
+        while k:
+            tree[k] = op(tree[2*k], tree[2*k+1])
+            k >>= 1
+
+    def append(self, value: Any) -> None:
+        """Append `value` to the end of the values."""
+        if self.n == self.capacity:
+            leaves = self.tree[self.capacity:self.capacity+self.n]
+            self._build(leaves, 2 * self.capacity)
+        self.n += 1
+        self.update(self.n - 1, value)
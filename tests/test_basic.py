@@ -543,6 +543,37 @@ class ListDataStructure(unittest.TestCase):
         self.assertEqual(basic.Array(maxlength=10).first(), 0)
         # Nonempty.
         self.assertEqual(basic.Array(elements=[1], maxlength=10).first(), 0)
+    
+    def test_array_version(self):
+        """Every modification should increment the version.
+        
+        The version should not take part in comparisons.
+        """
+        array = basic.Array(elements=[1, 2], maxlength=5)
+        self.assertEqual(array.version, 0)
+        array.insert(3, 1)
+        array.delete(0)
+        self.assertEqual(array.version, 2)
+        array.locate(3)
+        array.retrieve(0)
+        self.assertEqual(array.version, 2)
+        array.makenull()
+        self.assertEqual(array.version, 3)
+        self.assertEqual(basic.Array(), basic.Array())
+        other = basic.Array(elements=[1], maxlength=2)
+        other.delete(0)
+        self.assertEqual(other, basic.Array(elements=[1], last=-1,
+                                            maxlength=2))
+    
+    def test_array_sequence_protocol(self):
+        """len and indexing should cover the positions 0 to last."""
+        array = basic.Array(elements=[4, 8, 15, 16], last=2)
+        self.assertEqual(len(array), 3)
+        self.assertEqual(array[2], 15)
+        self.assertEqual(list(array), [4, 8, 15])
+        with self.assertRaises(IndexError):
+            array[3]
+        self.assertEqual(len(basic.Array()), 0)
 
 
 class SingleLinkedList(unittest.TestCase):
@@ -868,6 +899,27 @@ class SingleLinkedList(unittest.TestCase):
         
         The elements should be printed in the order of occurrence.
         """
+    
+    def test_singly_linked_list_version(self):
+        """Every modification should increment the version.
+        
+        Failed modifications should leave it unchanged.
+        """
+        linked_list = basic.SLinkedList(elements=range(self.k))
+        self.assertEqual(linked_list.version, 0)
+        linked_list.insert(-1, 0)
+        linked_list.delete(5)
+        self.assertEqual(linked_list.version, 2)
+        with self.assertRaises(IndexError):
+            linked_list.delete(2 * self.k)
+        with self.assertRaises(IndexError):
+            linked_list.insert(0, 2 * self.k)
+        linked_list.locate(3)
+        linked_list.retrieve(3)
+        self.assertEqual(linked_list.version, 2)
+        linked_list.makenull()
+        self.assertEqual(linked_list.version, 3)
+        self.assertEqual(linked_list, basic.SLinkedList())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import benchmarks.sorting as sorting
+from algorithms.sorter import PARALLEL_THRESHOLD
+
+
+class SortingBenchmarks(unittest.TestCase):
+
+    def record(self, algorithm, **metrics):
+        return {'algorithm': algorithm, 'distribution': 'random',
+                'size': 10, 'time': 1.0, 'comparisons': 100, 'moves': 50,
+                'peak_memory': 1000, **metrics}
+
+    def test_run(self):
+        """Every algorithm should give a record per distribution and size."""
+        results = sorting.run(['merge_sort', 'insertion'],
+                              ['random', 'sorted'], [5, 20], repeat=1)
+        self.assertEqual(results['meta']['seed'], 0)
+        self.assertEqual(results['meta']['repeat'], 1)
+        keys = [(r['algorithm'], r['distribution'], r['size'])
+                for r in results['results']]
+        self.assertEqual(len(keys), 8)
+        self.assertEqual(len(set(keys)), 8)
+        for record in results['results']:
+            self.assertGreaterEqual(record['time'], 0)
+            self.assertGreater(record['comparisons'], 0)
+            self.assertGreaterEqual(record['peak_memory'], 0)
+        # the inputs depend on the seed only
+        again = sorting.run(['merge_sort', 'insertion'],
+                            ['random', 'sorted'], [5, 20], repeat=1)
+        self.assertEqual([r['comparisons'] for r in results['results']],
+                         [r['comparisons'] for r in again['results']])
+
+    def test_size_limits(self):
+        """Sizes above the limit of an algorithm should be skipped."""
+        limit = sorting.SIZE_LIMITS['insertion_sort_r']
+        results = sorting.run(['insertion_sort_r'], ['sorted'],
+                              [limit + 1], repeat=1)
+        self.assertListEqual(results['results'], [])
+
+    def test_parallel_sort_size(self):
+        """parallel_sort should be benchmarked above its threshold."""
+        self.assertIn('parallel_sort', sorting.ALGORITHMS)
+        self.assertGreaterEqual(max(sorting.SIZES), PARALLEL_THRESHOLD)
+
+    def test_compare(self):
+        """Only worse time, memory or counts should be regressions."""
+        old = {'results': [
+            self.record('sort'), self.record('merge_sort'),
+            self.record('radix_sort'), self.record('selection')]}
+        new = {'results': [
+            self.record('sort', time=1.05),
+            self.record('merge_sort', time=1.5, moves=51),
+            self.record('radix_sort', peak_memory=900, comparisons=90),
+            self.record('selection', size=20, time=9.0),
+            self.record('bubble', time=9.0)]}
+        regressions = sorting.compare(old, new)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(r.startswith('merge_sort on random n=10: ')
+                            for r in regressions))
+        self.assertIn('time 1 -> 1.5', regressions[0])
+        self.assertIn('moves 50 -> 51', regressions[1])
+        self.assertEqual(len(sorting.compare(old, new, tolerance=0.01)), 3)
+
+    def test_save_load(self):
+        """Saved results should be loaded back unchanged."""
+        results = sorting.run(['sort'], ['few_unique'], [30], repeat=1)
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'results.json')
+            sorting.save(results, path)
+            self.assertEqual(sorting.load(path), results)
+        self.assertListEqual(sorting.compare(results, results), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
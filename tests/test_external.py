@@ -0,0 +1,80 @@
+import array
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+import algorithms.external as external
+
+
+class ExternalSort(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.workdir.name, 'source')
+        self.target = os.path.join(self.workdir.name, 'target')
+        rng = random.Random(3)
+        self.values = [rng.uniform(-1e6, 1e6) for _ in range(5000)]
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_binary_file(self):
+        '''Binary files should be sorted through several merge passes.'''
+        with open(self.source, 'wb') as f:
+            array.array('d', self.values).tofile(f)
+        # 100 values per run and fan-in 3 force a three-level merge
+        external.external_sort(self.source, self.target, 'd',
+                               memory=1600, fan_in=3)
+        result = array.array('d')
+        with open(self.target, 'rb') as f:
+            result.frombytes(f.read())
+        self.assertListEqual(result.tolist(), sorted(self.values))
+
+    def test_text_file(self):
+        '''Text files should be sorted line by line.'''
+        values = [int(v) for v in self.values]
+        with open(self.source, 'w') as f:
+            f.writelines(f'{v}\n' for v in values)
+        external.external_sort(self.source, self.target, 'q', text=True,
+                               memory=4096, fan_in=4)
+        with open(self.target) as f:
+            result = [int(line) for line in f]
+        self.assertListEqual(result, sorted(values))
+
+    def test_empty_file(self):
+        '''An empty input should give an empty output.'''
+        open(self.source, 'wb').close()
+        external.external_sort(self.source, self.target)
+        self.assertEqual(os.path.getsize(self.target), 0)
+
+    def test_memory_budget(self):
+        '''The values held at once should fit in the memory budget.'''
+        rng = random.Random(4)
+        values = [rng.uniform(-1e9, 1e9) for _ in range(100000)]
+        with open(self.source, 'wb') as f:
+            array.array('d', values).tofile(f)
+        memory = 2**18
+        tracemalloc.start()
+        try:
+            external.external_sort(self.source, self.target, 'd',
+                                   memory=memory)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(peak, memory)
+        result = array.array('d')
+        with open(self.target, 'rb') as f:
+            result.frombytes(f.read())
+        self.assertListEqual(result.tolist(), sorted(values))
+
+    def test_bad_parameters(self):
+        '''Invalid budget, fan-in or typecode should raise ValueError.'''
+        open(self.source, 'wb').close()
+        for kwargs in ({'fan_in': 1}, {'memory': 8}, {'typecode': 'u'}):
+            self.assertRaises(ValueError, external.external_sort,
+                              self.source, self.target, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,240 @@
+import array
+import itertools
+import random
+import sys
+import unittest
+import unittest.mock
+import algorithms.misc as misc
+
+
+def digits(m, N):
+    '''Little-endian digits of m computed one exact divmod at a time'''
+    result = []
+    while m > 0:
+        m, digit = divmod(m, N)
+        result.append(digit)
+    return result
+
+
+class ToBase(unittest.TestCase):
+
+    def test_small_numbers(self):
+        '''Digits should be little-endian, non-positive numbers give [].'''
+        self.assertEqual(misc.to_base(6), [0, 1, 1])
+        self.assertEqual(misc.to_base(255, 16), [15, 15])
+        self.assertEqual(misc.to_base(100, 10), [0, 0, 1])
+        self.assertEqual(misc.to_base(0), [])
+        self.assertEqual(misc.to_base(-7, 3), [])
+        with self.assertRaises(ValueError):
+            misc.to_base(5, 1)
+
+    def test_exact_for_big_numbers(self):
+        '''Conversion should be exact far beyond 2**53 and 1000 digits.'''
+        rng = random.Random(6)
+        numbers = [2 ** 53 + 1, 10 ** 3000 - 1, rng.getrandbits(20000)]
+        for N in (2, 3, 4, 8, 10, 16, 32, 60, 256, 1 << 20):
+            for m in numbers:
+                self.assertEqual(misc.to_base(m, N), digits(m, N))
+        self.assertEqual(misc.to_base(10 ** 3000, 10), [0] * 3000 + [1])
+
+
+class BinaryArithmetic(unittest.TestCase):
+
+    def test_adbin(self):
+        '''adbin should return the n+1 bits of the sum.'''
+        self.assertEqual(misc.adbin([1, 1, 0], [1, 0, 1], 3), [0, 0, 0, 1])
+        self.assertEqual(misc.adbin([1, 0, 1, 1], [1, 0], 2), [0, 1, 0])
+        self.assertEqual(misc.adbin([], [], 0), [0])
+        rng = random.Random(7)
+        for n in (1, 63, 64, 65, 4096):
+            a = rng.getrandbits(n)
+            b = rng.getrandbits(n)
+            total = misc.adbin(misc.to_base(a) + [0] * n,
+                               misc.to_base(b) + [0] * n, n)
+            self.assertEqual(len(total), n + 1)
+            self.assertEqual(total[:len(misc.to_base(a + b))],
+                             misc.to_base(a + b))
+
+    def test_bit_vector_arithmetic(self):
+        '''Arithmetic should wrap modulo 2**width like machine words.'''
+        x = misc.BitVector(0b1011, 4)
+        self.assertEqual(x + 6, misc.BitVector(0b0001, 4))
+        self.assertEqual(x.add_with_carry(misc.BitVector(6, 4)),
+                         (misc.BitVector(1, 4), 1))
+        self.assertEqual(x - 12, misc.BitVector(15, 4))
+        self.assertEqual(x << 2, misc.BitVector(0b1100, 4))
+        self.assertEqual(x >> 3, misc.BitVector(1, 4))
+        self.assertLess(misc.BitVector(3, 4), x)
+        self.assertGreaterEqual(x, 11)
+        five = misc.BitVector(5, 8)
+        self.assertTrue(five == 5 and 5 == five)
+        self.assertTrue(five <= 5 and five >= 5)
+        self.assertFalse(five > 5 or five < 5 or five != 5)
+        self.assertTrue(five > 4 and five <= 6)
+        # ints are compared by value, not modulo 2**width
+        self.assertLess(misc.BitVector(1, 8), 257)
+        self.assertNotEqual(misc.BitVector(1, 8), 257)
+        self.assertEqual(hash(five), hash(5))
+        self.assertNotEqual(five, '5')
+        self.assertEqual((int(x), len(x)), (11, 4))
+        with self.assertRaises(ValueError):
+            x + misc.BitVector(1, 8)
+        with self.assertRaises(ValueError):
+            misc.BitVector(16, 4)
+
+    def test_bit_vector_bits(self):
+        '''Conversions should round trip the little-endian bit lists.'''
+        bits = [1, 0, 0, 1, 1, 0, 0, 0]
+        x = misc.BitVector.from_bits(bits)
+        self.assertEqual((x.value, x.width), (25, 8))
+        self.assertEqual(x.to_bits(), bits)
+        self.assertEqual(misc.BitVector(0, 0).to_bits(), [])
+        with self.assertRaises(ValueError):
+            misc.BitVector.from_bits([0, 2])
+
+
+class ToBaseMany(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(8)
+        self.values = [0, 61, 62]
+        self.values += [rng.randrange(62 ** 6) for _ in range(5000)]
+        self.rows = [misc.to_base(value, 62) for value in self.values]
+        self.rows = [row + [0] * (6 - len(row)) for row in self.rows]
+
+    def test_pure_python(self):
+        '''Without numpy the rows should be lists of padded digits.'''
+        with unittest.mock.patch.object(misc, 'np', None):
+            self.assertEqual(misc.to_base_many(self.values, 62), self.rows)
+            out = bytearray(len(self.values) * 6)
+            self.assertIs(misc.to_base_many(self.values, 62, out=out), out)
+            self.assertEqual(list(out), sum(self.rows, []))
+            self.assertEqual(misc.to_base_many([5, 2], 2, width=4),
+                             [[1, 0, 1, 0], [0, 1, 0, 0]])
+            self.assertEqual(misc.to_base_many([], 10), [])
+            with self.assertRaises(ValueError):
+                misc.to_base_many([16], 2, width=4)
+            # the value too wide for the width is in the last chunk
+            values = [5] * misc.TO_BASE_CHUNK + [16]
+            out = bytearray(b'\xff' * 4 * len(values))
+            with self.assertRaises(ValueError):
+                misc.to_base_many(values, 2, width=4, out=out)
+            self.assertEqual(out, b'\xff' * 4 * len(values))
+            with self.assertRaises(ValueError):
+                misc.to_base_many([1], 1000, out=bytearray(1))
+            with self.assertRaises(ValueError):
+                misc.to_base_many([1.5, 2.5], 10)
+
+    @unittest.skipIf(misc.np is None, 'numpy is not installed')
+    def test_numpy(self):
+        '''With numpy the rows should be a matrix of the same digits.'''
+        rows = misc.to_base_many(self.values, 62)
+        self.assertEqual(rows.shape, (len(self.values), 6))
+        self.assertEqual(rows.tolist(), self.rows)
+        out = array.array('H', bytes(2 * len(self.values) * 6))
+        self.assertIs(misc.to_base_many(self.values, 62, out=out), out)
+        self.assertEqual(out.tolist(), sum(self.rows, []))
+        with self.assertRaises(ValueError):
+            misc.to_base_many([-1], 10)
+        with self.assertRaises(ValueError):
+            misc.to_base_many(self.values, 62, out=bytearray(10))
+        # values beyond 64 bits are converted without numpy, but the
+        # result is still an ndarray
+        rows = misc.to_base_many([2 ** 70, 5], 2 ** 35)
+        self.assertIsInstance(rows, misc.np.ndarray)
+        self.assertEqual(rows.tolist(), [[0, 0, 1], [5, 0, 0]])
+        self.assertEqual(misc.to_base_many([2 ** 64], 2 ** 64).tolist(),
+                         [[0, 1]])
+        for floats in ([1.5, 2.5], misc.np.array([1.0, 2.0]), [1, 2.5]):
+            with self.assertRaises(ValueError):
+                misc.to_base_many(floats, 10)
+
+    @unittest.skipIf(misc.np is None, 'numpy is not installed')
+    def test_numpy_narrow_dtypes(self):
+        '''Narrow dtypes should work with any base and fail before writing.'''
+        np = misc.np
+        for dtype in (np.uint8, np.int8, np.int16, np.uint32):
+            keys = np.array([0, 5, 100], dtype=dtype)
+            self.assertEqual(misc.to_base_many(keys, 1000).tolist(),
+                             [[0], [5], [100]])
+            self.assertEqual(misc.to_base_many(keys, 300, width=2).tolist(),
+                             [[0, 0], [5, 0], [100, 0]])
+        out = bytearray(b'\xff' * 8)
+        with self.assertRaises(ValueError):
+            misc.to_base_many(np.array([5, 16]), 2, width=4, out=out)
+        self.assertEqual(out, b'\xff' * 8)
+        with self.assertRaises(ValueError):
+            misc.to_base_many(np.array([2**64 - 1], np.uint64), 2, width=63)
+
+
+class IterDigits(unittest.TestCase):
+
+    def test_most_significant_first(self):
+        '''The digits should be those of to_base in reverse order.'''
+        rng = random.Random(9)
+        numbers = [1, 9, 10, 10 ** 40, rng.getrandbits(5000)]
+        for N in (2, 3, 10, 16, 32, 36, 62):
+            for m in numbers:
+                self.assertEqual(list(misc.iter_digits(m, N)),
+                                 misc.to_base(m, N)[::-1])
+        self.assertEqual(list(misc.iter_digits(0)), [])
+        self.assertEqual(list(misc.iter_digits(-4, 3)), [])
+        with self.assertRaises(ValueError):
+            misc.iter_digits(5, 1)
+
+    def test_leading_digits(self):
+        '''A prefix should be available without converting the rest.'''
+        m = 31415 * 10 ** 4000 + 2 ** 1000
+        digits = misc.iter_digits(m, 10)
+        self.assertEqual(list(itertools.islice(digits, 5)), [3, 1, 4, 1, 5])
+        self.assertEqual(next(digits), 0)
+        with unittest.mock.patch.object(misc, '_iter_split',
+                                        wraps=misc._iter_split) as split:
+            leading = list(itertools.islice(misc.iter_digits(m, 10), 3))
+        self.assertEqual(leading, [3, 1, 4])
+        # converting all the 4096 padded digits takes 255 calls
+        self.assertLess(split.call_count, 32)
+
+
+class DigitMultiplication(unittest.TestCase):
+
+    def value(self, digits, N):
+        return sum(digit * N ** i for i, digit in enumerate(digits))
+
+    def test_products(self):
+        '''Products should be exact, little-endian and of fixed width.'''
+        self.assertEqual(misc.mul_digits([1, 1], [1, 1]), [1, 0, 0, 1])
+        self.assertEqual(misc.mul_digits([9, 9], [9], 10), [1, 9, 8])
+        self.assertEqual(misc.mul_digits([], [3, 1], 5), [0, 0])
+        rng = random.Random(10)
+        # sizes on both sides of MUL_THRESHOLD, slots of 1 to 8+ bytes
+        for N in (2, 10, 62, 2 ** 16, 2 ** 40):
+            for n, m in ((3, 40), (9, 9), (200, 150), (1000, 1)):
+                a = [rng.randrange(N) for _ in range(n)]
+                b = [rng.randrange(N) for _ in range(m)]
+                product = misc.mul_digits(a, b, N)
+                self.assertEqual(len(product), n + m)
+                self.assertEqual(self.value(product, N),
+                                 self.value(a, N) * self.value(b, N))
+
+    def test_slots_are_little_endian(self):
+        '''Packed slots should be little-endian whatever the host.'''
+        for byteorder in ('little', 'big'):
+            host = unittest.mock.Mock(byteorder=byteorder)
+            values = array.array('H', [0x0102, 0x0304])
+            if byteorder != sys.byteorder:
+                values.byteswap()  # as stored natively on that host
+            with unittest.mock.patch.object(misc, 'sys', host):
+                self.assertEqual(misc._little_endian(values),
+                                 b'\x02\x01\x04\x03')
+
+    def test_invalid_digits(self):
+        '''Digits outside range(N) should be rejected.'''
+        with self.assertRaises(ValueError):
+            misc.mul_digits([1, 2], [1], 2)
+        with self.assertRaises(ValueError):
+            misc.mul_digits([1], [-1], 10)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,5 +1,13 @@
+import array
+import bisect
+import os
+import random
+import tempfile
 import unittest
+import unittest.mock
 import algorithms.search as search
+import algorithms.sorter as sorter
+import datastructures.basic as basic
 
 class BinarySearch(unittest.TestCase):
 
@@ -56,6 +64,29 @@ class BinarySearch(unittest.TestCase):
             self.assertFalse(search.is_sorted(l))
         for l in sorted_lists:
             self.assertTrue(search.is_sorted(l))
+
+    def test_sorted_prefix(self):
+        '''sorted_prefix should return the index of the first descent.'''
+        a_list = [0, 1, 1, 5, 3, 4, 2]
+        self.assertEqual(search.sorted_prefix(a_list), 4)
+        self.assertEqual(search.sorted_prefix(a_list[:4]), 4)
+        self.assertEqual(search.sorted_prefix([]), 0)
+        self.assertEqual(search.sorted_prefix(['a', 'c', 'b']), 2)
+        typed = array.array('d', a_list)
+        self.assertEqual(search.sorted_prefix(typed), 4)
+        self.assertEqual(search.sorted_prefix(memoryview(typed)), 4)
+        self.assertEqual(search.sorted_prefix(sorter.Numbers(typed)), 4)
+
+    @unittest.skipIf(search.np is None, 'numpy is not installed')
+    def test_sorted_prefix_blocks(self):
+        '''Blocked and threaded checks should find the first descent.'''
+        a_list = search.np.arange(1000)
+        a_list[[300, 700]] = -1
+        with unittest.mock.patch.object(search, 'SORTED_BLOCK', 64):
+            for workers in (1, 4):
+                self.assertEqual(search.sorted_prefix(a_list, workers), 300)
+                self.assertEqual(
+                    search.sorted_prefix(a_list[:300], workers), 300)
     
     def test_binary_search_unsorted_input_list(self):
         '''binary_search should raise exception when input list is unsorted.'''
@@ -68,6 +99,462 @@ class BinarySearch(unittest.TestCase):
             self.assertRaises(search.InputError,
                 search.binary_search, 1.5, l, 0, 1)
 
+    def test_binary_search_trusted(self):
+        '''binary_search should skip the sortedness check when trusted.'''
+        a_list = [3, 1, 2]
+        with unittest.mock.patch.object(search, 'is_sorted') as is_sorted:
+            search.binary_search(1, a_list, 0, 2, trusted=True)
+        is_sorted.assert_not_called()
+
+    def test_binary_search_versioned_cache(self):
+        '''Sortedness of a Numbers instance should be checked once per version.'''
+        inst = sorter.Numbers(list(range(0, 100, 3)))
+        with unittest.mock.patch.object(
+                search, 'is_sorted', wraps=search.is_sorted) as is_sorted:
+            for i in range(len(inst)):
+                self.assertEqual(i, search.binary_search(
+                    inst[i], inst, 0, len(inst)-1))
+            self.assertEqual(is_sorted.call_count, 1)
+            inst[0] = 1000
+            self.assertRaises(search.InputError,
+                search.binary_search, 3, inst, 0, len(inst)-1)
+            inst.sort()
+            self.assertEqual(len(inst)-1, search.binary_search(
+                1000, inst, 0, len(inst)-1))
+            self.assertEqual(is_sorted.call_count, 3)
+
+    def test_binary_search_cache_unhashable(self):
+        '''Unhashable versioned sequences should be checked once per version.'''
+        a_list = basic.Array(elements=[1, 3, 5], maxlength=4)
+        self.assertRaises(TypeError, hash, a_list)
+        with unittest.mock.patch.object(
+                search, 'is_sorted', wraps=search.is_sorted) as is_sorted:
+            for _ in range(3):
+                self.assertEqual(search.binary_search(3, a_list, 0, 2), 1)
+            self.assertEqual(is_sorted.call_count, 1)
+            a_list.insert(7, 3)
+            for _ in range(3):
+                self.assertEqual(search.binary_search(7, a_list, 0, 3), 3)
+            self.assertEqual(is_sorted.call_count, 2)
+        # the entry goes with the sequence; the mock keeps the old one alive
+        a_list = basic.Array(elements=[1, 3, 5], maxlength=4)
+        search.binary_search(3, a_list, 0, 2)
+        key = id(a_list)
+        self.assertIn(key, search._sorted_cache)
+        del a_list
+        self.assertNotIn(key, search._sorted_cache)
+
+
+class SearchMany(unittest.TestCase):
+
+    def setUp(self):
+        self.a_list = [-7, -3, -3, 0, 2.5, 4, 4, 4, 9, 12]
+        self.values = [4, 13, -3, 1, -8, 9, 2.5]
+
+    def expected(self, values):
+        return [self.a_list.index(v) if v in self.a_list else None
+                for v in values]
+
+    def test_search_many_unsorted_batch(self):
+        '''search_many should find the first occurrence of each value.'''
+        self.assertListEqual(search.search_many(self.values, self.a_list),
+                             self.expected(self.values))
+
+    def test_search_many_sorted_batch(self):
+        '''A sorted batch should give the same results as an unsorted one.'''
+        values = sorted(self.values)
+        self.assertListEqual(search.search_many(values, self.a_list),
+                             self.expected(values))
+        self.assertListEqual(
+            search.search_many(values, self.a_list, insertion_points=True),
+            [0, 1, 4, 4, 5, 8, 10])
+
+    def test_search_many_numbers_and_errors(self):
+        '''search_many should accept Numbers and reject unsorted lists.'''
+        inst = sorter.Numbers(self.a_list)
+        self.assertListEqual(search.search_many(self.values, inst),
+                             self.expected(self.values))
+        self.assertRaises(search.InputError,
+            search.search_many, [1], [3, 2, 1])
+        self.assertListEqual(search.search_many([], self.a_list), [])
+
+    @unittest.skipIf(search.np is None, 'numpy is not installed')
+    def test_search_many_numpy(self):
+        '''The numpy path should agree with the pure-Python one.'''
+        np = search.np
+        result = search.search_many(np.array(self.values), self.a_list)
+        self.assertListEqual(result, self.expected(self.values))
+        result = search.search_many(self.values, np.array(self.a_list),
+                                    insertion_points=True)
+        self.assertListEqual(result, search.search_many(
+            self.values, self.a_list, insertion_points=True))
+
+
+class SearchIndexEytzinger(unittest.TestCase):
+
+    def test_bounds_match_bisect(self):
+        '''lower_bound and upper_bound should agree with the bisect module.'''
+        rng = random.Random(0)
+        for n in (0, 1, 2, 7, 8, 100):
+            a_list = sorted(rng.randint(-20, 20) for _ in range(n))
+            index = search.SearchIndex(a_list)
+            self.assertEqual(len(index), n)
+            for value in range(-22, 23):
+                self.assertEqual(index.lower_bound(value),
+                                 bisect.bisect_left(a_list, value))
+                self.assertEqual(index.upper_bound(value),
+                                 bisect.bisect_right(a_list, value))
+
+    def test_search(self):
+        '''search should return the first index of a key or None.'''
+        a_list = [-8.36, -5.97, -2.54, -2.54, 3.75, 4.77, 5.91]
+        index = search.SearchIndex(a_list)
+        for value in a_list:
+            self.assertEqual(index.search(value), a_list.index(value))
+        self.assertIsNone(index.search(0))
+        self.assertIn(3.75, index)
+        self.assertNotIn(10, index)
+        c_list = ['a', 'aa', 'b', 'c', 'ddd']
+        self.assertEqual(search.SearchIndex(c_list).search('c'), 3)
+
+    def test_storage(self):
+        '''Mixed keys should be stored as doubles only if exactly held.'''
+        big = 2**53 + 1
+        index = search.SearchIndex([0.5, big])
+        self.assertIsInstance(index._tree, list)
+        self.assertEqual(index.search(big), 1)
+        self.assertIsNone(index.search(big - 1))
+        index = search.SearchIndex([0.5, 2**53, 10**400])
+        self.assertIsInstance(index._tree, list)
+        index = search.SearchIndex([-1, 0.5, 2**53])
+        self.assertEqual(index._tree.typecode, 'd')
+        a_list = array.array('i', [-3, 1, 4])
+        self.assertEqual(search.SearchIndex(a_list)._tree.typecode, 'i')
+
+    @unittest.skipIf(search.np is None, 'numpy is not installed')
+    def test_storage_ndarray(self):
+        '''An ndarray should be stored with the typecode of its dtype.'''
+        np = search.np
+        a_list = np.array([-2**62, -1, 0, 2**62], dtype=np.int64)
+        index = search.SearchIndex(a_list)
+        self.assertEqual(index._tree.typecode, a_list.dtype.char)
+        for i, value in enumerate(a_list.tolist()):
+            self.assertEqual(index.search(value), i)
+        a_list = np.array([-1.5, 0.25], dtype=np.float32)
+        index = search.SearchIndex(sorter.Numbers(a_list))
+        self.assertEqual(index._tree.typecode, 'f')
+        self.assertEqual(index.lower_bound(0), 1)
+
+    def test_unsorted_input(self):
+        '''Building an index of unsorted keys should raise InputError.'''
+        self.assertRaises(search.InputError, search.SearchIndex, [2, 1])
+
+
+class ProbeCounter(list):
+    '''A list counting the reads of its elements.'''
+    probes = 0
+
+    def __getitem__(self, i):
+        self.probes += 1
+        return list.__getitem__(self, i)
+
+
+class Stream:
+    '''An unbounded-looking sequence of the multiples of 3 below 3n.'''
+    def __init__(self, n):
+        self.n = n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError
+        return 3 * i
+
+
+class OtherSearchModes(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.a_list = sorted(rng.randint(-50, 50) for _ in range(60))
+        self.values = range(-52, 53)
+
+    def assertFinds(self, result, value):
+        if value in self.a_list:
+            self.assertEqual(self.a_list[result], value)
+        else:
+            self.assertIsNone(result)
+
+    def test_interpolation_search(self):
+        '''interpolation_search should find every value of the list.'''
+        for value in self.values:
+            self.assertFinds(
+                search.interpolation_search(value, self.a_list), value)
+        self.assertRaises(search.InputError,
+            search.interpolation_search, 1, [2, 1])
+
+    def test_interpolation_search_probes(self):
+        '''Uniform keys should take far fewer probes than log n.'''
+        a_list = ProbeCounter(range(0, 3 * 2**16, 3))
+        search.interpolation_search(3 * 12345, a_list, trusted=True)
+        self.assertLess(a_list.probes, 8)
+
+    @unittest.skipIf(search.np is None, 'numpy is not installed')
+    def test_interpolation_search_int64(self):
+        '''Large int64 keys should not overflow the probe arithmetic.'''
+        np = search.np
+        keys = np.arange(0, 2**62, 2**62 // 1000)
+        for a_list in (keys, sorter.Numbers(keys)):
+            for i in (0, 1, 500, 998, 999):
+                self.assertEqual(
+                    search.interpolation_search(int(keys[i]), a_list), i)
+                self.assertEqual(
+                    search.interpolation_search(keys[i], a_list), i)
+            self.assertIsNone(
+                search.interpolation_search(int(keys[500]) + 1, a_list))
+        self.assertTrue(search._looks_uniform(keys))
+        self.assertEqual(search.adaptive_search(int(keys[700]), keys), 700)
+
+    def test_exponential_search(self):
+        '''exponential_search should work from any starting position.'''
+        for value in self.values:
+            for start in (0, 17, 59, 70):
+                self.assertFinds(
+                    search.exponential_search(value, self.a_list, start),
+                    value)
+        stream = Stream(1000)
+        self.assertEqual(search.exponential_search(300, stream, 10), 100)
+        self.assertEqual(search.exponential_search(2997, stream), 999)
+        self.assertIsNone(search.exponential_search(3000, stream))
+
+    def test_adaptive_search(self):
+        '''adaptive_search should pick a mode and agree with binary_search.'''
+        uniform = list(range(0, 3000, 3))
+        skewed = [2**i for i in range(60)]
+        for a_list in (uniform, skewed, self.a_list):
+            for value in a_list[::7] + [-1, 5000]:
+                expected = search.binary_search(
+                    value, a_list, 0, len(a_list)-1)
+                result = search.adaptive_search(value, a_list)
+                if expected is None:
+                    self.assertIsNone(result)
+                else:
+                    self.assertEqual(a_list[result], value)
+                self.assertEqual(
+                    search.adaptive_search(value, a_list, hint=3) is None,
+                    expected is None)
+        self.assertTrue(search._looks_uniform(uniform))
+        self.assertFalse(search._looks_uniform(skewed))
+
+
+class BoundsAndRanges(unittest.TestCase):
+
+    def setUp(self):
+        self.a_list = [-7, -3, -3, 0, 2.5, 4, 4, 4, 9, 12]
+
+    def test_lower_upper_bound(self):
+        '''Bounds should be the leftmost and rightmost insertion points.'''
+        for value in (-8, -7, -3, -1, 0, 2.5, 3, 4, 12, 13):
+            self.assertEqual(search.lower_bound(value, self.a_list),
+                             bisect.bisect_left(self.a_list, value))
+            self.assertEqual(search.upper_bound(value, self.a_list),
+                             bisect.bisect_right(self.a_list, value))
+        self.assertEqual(search.lower_bound(4, self.a_list, 0, 4), 5)
+        self.assertEqual(search.upper_bound(-3, self.a_list, 2), 3)
+        inst = sorter.Numbers(self.a_list)
+        self.assertEqual(search.lower_bound(4, inst), 5)
+
+    def test_equal_range(self):
+        '''equal_range should enclose every occurrence of the value.'''
+        self.assertEqual(search.equal_range(4, self.a_list), (5, 8))
+        self.assertEqual(search.equal_range(-3, self.a_list), (1, 3))
+        self.assertEqual(search.equal_range(1, self.a_list), (4, 4))
+        self.assertEqual(search.equal_range(1, []), (0, 0))
+
+    def test_count_in_range(self):
+        '''count_in_range should count the keys of a closed interval.'''
+        for lo, hi in ((-3, 4), (-100, 100), (0, 0), (5, 8), (3, -3)):
+            self.assertEqual(search.count_in_range(lo, hi, self.a_list),
+                             len([k for k in self.a_list if lo <= k <= hi]))
+
+
+class MappedIndexFile(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.workdir.name, 'index')
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_queries(self):
+        '''A mapped index should answer like searching the list.'''
+        rng = random.Random(5)
+        a_list = sorted(rng.randint(-500, 500) for _ in range(1000))
+        search.write_index(self.path, a_list)
+        with search.MappedIndex(self.path) as index:
+            self.assertEqual(len(index), len(a_list))
+            self.assertEqual(index[10], a_list[10])
+            for value in range(-505, 506, 7):
+                self.assertEqual(index.lower_bound(value),
+                                 bisect.bisect_left(a_list, value))
+                self.assertEqual(index.upper_bound(value),
+                                 bisect.bisect_right(a_list, value))
+                i = index.binary_search(value)
+                if value in a_list:
+                    self.assertEqual(a_list[i], value)
+                else:
+                    self.assertIsNone(i)
+
+    def test_floats_and_empty(self):
+        '''Floats should be stored as doubles; empty indexes are valid.'''
+        search.write_index(self.path, [-1.5, 0.25, 3.0])
+        with search.MappedIndex(self.path) as index:
+            self.assertEqual(list(index), [-1.5, 0.25, 3.0])
+            self.assertEqual(index.binary_search(0.25), 1)
+        search.write_index(self.path, [])
+        with search.MappedIndex(self.path) as index:
+            self.assertEqual(len(index), 0)
+            self.assertIsNone(index.binary_search(1))
+
+    def test_typecode_of_input(self):
+        '''Typed input should be written with its own typecode.'''
+        a_list = array.array('i', [-5, 0, 2**31 - 1])
+        search.write_index(self.path, a_list)
+        with search.MappedIndex(self.path) as index:
+            self.assertEqual(index._keys.format, 'i')
+            self.assertEqual(list(index), a_list.tolist())
+        for typecode in ('u', 'x'):
+            with self.assertRaises(search.InputError):
+                search.write_index(self.path, [1, 2], typecode)
+
+    @unittest.skipIf(search.np is None, 'numpy is not installed')
+    def test_typecode_of_ndarray(self):
+        '''An int64 ndarray should be written as integers, not doubles.'''
+        np = search.np
+        a_list = np.array([-2**62, 3, 2**62 + 1], dtype=np.int64)
+        for keys in (a_list, sorter.Numbers(a_list)):
+            search.write_index(self.path, keys)
+            with search.MappedIndex(self.path) as index:
+                self.assertEqual(index._keys.format, a_list.dtype.char)
+                self.assertEqual(list(index), a_list.tolist())
+        with self.assertRaises(search.InputError):
+            search.write_index(self.path, np.array([1, 2], np.float16))
+
+    def test_invalid(self):
+        '''Unsorted input and foreign or truncated files should fail.'''
+        with self.assertRaises(search.InputError):
+            search.write_index(self.path, [2, 1])
+        with open(self.path, 'wb') as f:
+            f.write(b'not an index at all')
+        with self.assertRaises(search.InputError):
+            search.MappedIndex(self.path)
+        search.write_index(self.path, [1, 2, 3])
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(search.InputError):
+            search.MappedIndex(self.path)
+
+
+class CachedSearch(unittest.TestCase):
+
+    def test_hits_and_invalidation(self):
+        '''Repeated searches should hit until the sequence changes.'''
+        cache = search.SearchCache()
+        inst = sorter.Numbers([1, 3, 5, 7, 9])
+        for _ in range(3):
+            self.assertEqual(cache.binary_search(7, inst, 0, 4), 3)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        inst[3] = 8
+        self.assertIsNone(cache.binary_search(7, inst, 0, 4))
+        self.assertEqual(cache.misses, 2)
+        inst.append(11)
+        self.assertEqual(cache.binary_search(11, inst, 0, 5), 5)
+
+    def test_eviction(self):
+        '''The least recently used result should be evicted first.'''
+        cache = search.SearchCache(maxsize=2)
+        inst = sorter.Numbers([1, 2, 3])
+        cache.binary_search(1, inst, 0, 2)
+        cache.binary_search(2, inst, 0, 2)
+        cache.binary_search(1, inst, 0, 2)
+        cache.binary_search(3, inst, 0, 2)
+        self.assertEqual(len(cache), 2)
+        cache.binary_search(1, inst, 0, 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        with self.assertRaises(ValueError):
+            search.SearchCache(maxsize=0)
+
+    def test_trusted_results_kept_apart(self):
+        '''A trusted result should not skip a later sortedness check.'''
+        cache = search.SearchCache()
+        inst = sorter.Numbers([3, 1, 2])
+        self.assertEqual(cache.binary_search(1, inst, 0, 2, trusted=True), 1)
+        with self.assertRaises(search.InputError):
+            cache.binary_search(1, inst, 0, 2)
+
+    def test_basic_array(self):
+        '''Arrays of datastructures.basic should be cached by version.'''
+        cache = search.SearchCache()
+        a_list = basic.Array(elements=[1, 3, 5], maxlength=4)
+        self.assertEqual(cache.binary_search(5, a_list, 0, 2), 2)
+        self.assertEqual(cache.binary_search(5, a_list, 0, 2), 2)
+        self.assertEqual(cache.hits, 1)
+        a_list.delete(2)
+        a_list.insert(4, 2)
+        self.assertIsNone(cache.binary_search(5, a_list, 0, 2))
+        self.assertEqual(cache.binary_search(4, a_list, 0, 2), 2)
+
+    def test_unversioned(self):
+        '''Sequences without a version should not be cached.'''
+        cache = search.SearchCache()
+        a_list = [1, 2, 3]
+        self.assertEqual(cache.binary_search(2, a_list, 0, 2), 1)
+        self.assertEqual(cache.binary_search(2, a_list, 0, 2), 1)
+        self.assertEqual((len(cache), cache.hits), (0, 0))
+
+
+class PredicateBisection(unittest.TestCase):
+
+    def test_integer_boundary(self):
+        '''The first integer satisfying pred should be found quickly.'''
+        calls = []
+
+        def fits(batch):
+            calls.append(batch)
+            return batch * batch >= 10 ** 30
+        self.assertEqual(search.bisect_predicate(fits, 0, 10 ** 18),
+                         10 ** 15)
+        self.assertLessEqual(len(calls), 61)
+        self.assertEqual(search.bisect_predicate(lambda i: i >= 3, 0, 9), 3)
+        self.assertEqual(search.bisect_predicate(lambda i: True, 4, 9), 4)
+        self.assertEqual(search.bisect_predicate(lambda i: False, 4, 9), 10)
+        self.assertEqual(search.bisect_predicate(lambda i: True, 4, 3), 4)
+        a_list = [-2, 0, 0, 3, 8]
+        for value in range(-3, 10):
+            self.assertEqual(
+                search.bisect_predicate(lambda i: a_list[i] >= value, 0, 4),
+                search.lower_bound(value, a_list))
+        with self.assertRaises(search.InputError):
+            search.bisect_predicate(bool, 5, 2)
+
+    def test_float_boundary(self):
+        '''The boundary should be bracketed within the tolerance.'''
+        x = search.bisect_predicate_float(lambda x: x * x >= 2, 0.0, 2.0)
+        self.assertTrue(x * x >= 2)
+        self.assertAlmostEqual(x, 2 ** 0.5, delta=1e-9)
+        x = search.bisect_predicate_float(lambda x: x >= 0.3, 0.0, 1.0,
+                                          tolerance=1e-3)
+        self.assertTrue(0.3 <= x < 0.301)
+        # the tolerance below the float resolution must still terminate
+        x = search.bisect_predicate_float(lambda x: x >= 1e6 + 0.5,
+                                          1e6, 1e6 + 1, tolerance=1e-300)
+        self.assertEqual(x, 1e6 + 0.5)
+        self.assertEqual(
+            search.bisect_predicate_float(lambda x: False, 0.0, 1.0), 1.0)
+        with self.assertRaises(search.InputError):
+            search.bisect_predicate_float(bool, 0.0, 1.0, tolerance=0)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
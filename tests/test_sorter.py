@@ -1,4 +1,8 @@
+import array
+import random
+import tracemalloc
 import unittest
+import unittest.mock
 import algorithms.sorter as sorter
 
 
@@ -50,6 +54,25 @@ class NumbersClassListLikeProperties(unittest.TestCase):
 		a_list.append(29)
 		inst.append(29)
 		self.assertListEqual(a_list, inst.a_list)
+	
+	def test_version(self):
+		'''Every modifying method should increment the version'''
+		inst = sorter.Numbers([3, 1, 2])
+		self.assertEqual(inst.version, 0)
+		inst[0] = 4
+		inst.append(0)
+		del inst[1]
+		inst.sort()
+		self.assertEqual(inst.version, 4)
+		inst.min()
+		inst.nsmallest(1)
+		self.assertEqual(inst.version, 4)
+	
+	def test_min_max(self):
+		'''Numbers should report its smallest and largest element'''
+		inst = sorter.Numbers([0.73, -2.16, -6.22, 9, 2.35])
+		self.assertEqual(inst.min(), -6.22)
+		self.assertEqual(inst.max(), 9)
 
 class NumbersClassBadInput(unittest.TestCase):
 	
@@ -231,6 +254,419 @@ class NumbersClassMerge(unittest.TestCase):
 		a_correct_result = [2, 3, 6, 7, 9, 11, 12, 14]
 		a_inst.merge_sort()
 		self.assertListEqual(a_inst.a_list, a_correct_result)
+	
+	def test_merge_sort_duplicated_last_element(self):
+		'''merge_sort should sort the whole list when its last value repeats'''
+		a_list = [5, 3, 9, 5, 1, 5]
+		inst = sorter.Numbers(list(a_list))
+		inst.merge_sort()
+		self.assertListEqual(inst.a_list, sorted(a_list))
+	
+	def test_merge_sort_bu(self):
+		'''Bottom-up merge sort should handle runs of any shape'''
+		rng = random.Random(1)
+		inputs = [
+			[], [1], [2, 1],
+			[rng.randint(-99, 99) for _ in range(1000)],
+			list(range(300, 0, -1)),
+			list(range(0, 1000, 7)) + list(range(500, 0, -3)),
+			[rng.choice((0, 1.5, -2)) for _ in range(257)],
+		]
+		for a_list in inputs:
+			inst = sorter.Numbers(list(a_list))
+			inst.merge_sort_bu()
+			self.assertListEqual(inst.a_list, sorted(a_list))
+			inst = sorter.Numbers(a_list, typecode='d')
+			inst.merge_sort_bu()
+			self.assertEqual(list(inst.a_list), sorted(a_list))
+
+class NumbersClassSort(unittest.TestCase):
+	
+	def test_sort_random(self):
+		'''sort should order both short and long lists increasingly'''
+		rng = random.Random(0)
+		for n in (0, 1, 2, 5, 31, 32, 33, 100, 1000):
+			a_list = [rng.randint(-50, 50) for _ in range(n)]
+			inst = sorter.Numbers(list(a_list))
+			inst.sort()
+			self.assertListEqual(inst.a_list, sorted(a_list))
+	
+	def test_sort_presorted(self):
+		'''sort should handle sorted and reverse-sorted input'''
+		a_list = list(range(500))
+		inst = sorter.Numbers(list(a_list))
+		inst.sort()
+		self.assertListEqual(inst.a_list, a_list)
+		inst = sorter.Numbers(a_list[::-1])
+		inst.sort()
+		self.assertListEqual(inst.a_list, a_list)
+	
+	def test_sort_is_stable(self):
+		'''Equal ints and floats should keep their relative order'''
+		a_list = [3, 2.0, 1, 2, 3.0, 1.0] * 20
+		inst = sorter.Numbers(list(a_list))
+		inst.sort()
+		result = [(x, type(x)) for x in inst.a_list]
+		self.assertListEqual(result, [(x, type(x)) for x in sorted(a_list)])
+		inst = sorter.Numbers([2, 2.0, 1])
+		inst.sort()
+		self.assertListEqual([type(x) for x in inst.a_list], [int, int, float])
+
+class NumbersClassTypedStorage(unittest.TestCase):
+	
+	def test_array_is_not_copied(self):
+		'''An array.array passed to Numbers should be used as is'''
+		a_list = array.array('q', [5, -1, 3])
+		inst = sorter.Numbers(a_list)
+		self.assertIs(inst.a_list, a_list)
+		self.assertEqual(inst.typecode, 'q')
+		self.assertIsNone(sorter.Numbers([1, 2]).typecode)
+	
+	def test_typecode_conversion(self):
+		'''Lists and buffers should be converted to the given typecode'''
+		inst = sorter.Numbers([1.5, 2, -0.5], typecode='d')
+		self.assertEqual(inst.a_list, array.array('d', [1.5, 2.0, -0.5]))
+		raw = array.array('q', [7, 8]).tobytes()
+		inst = sorter.Numbers(raw, typecode='q')
+		self.assertEqual(inst.a_list, array.array('q', [7, 8]))
+		inst = sorter.Numbers(bytearray(raw), typecode='q')
+		self.assertEqual(inst.a_list, array.array('q', [7, 8]))
+		# other buffers are converted value by value, whatever their format
+		ones = array.array('B', [1] * 8)
+		for buffer in (ones, memoryview(ones)):
+			inst = sorter.Numbers(buffer, typecode='q')
+			self.assertEqual(inst.a_list, array.array('q', [1] * 8))
+	
+	def test_typecode_type_errors(self):
+		'''Values not fitting the typecode should raise NumbersTypeError'''
+		self.assertRaises(sorter.NumbersTypeError,
+			sorter.Numbers, [1, 2.5], typecode='q')
+		self.assertRaises(sorter.NumbersTypeError,
+			sorter.Numbers, [1, 2], typecode='u')
+		inst = sorter.Numbers(array.array('q', [1, 2]))
+		self.assertRaises(sorter.NumbersTypeError, inst.append, 0.5)
+		self.assertRaises(sorter.NumbersTypeError, inst.__setitem__, 0, 'Niko')
+		self.assertRaises(sorter.NumbersTypeError,
+			sorter.Numbers, [2**70], typecode='q')
+		self.assertRaises(sorter.NumbersTypeError, inst.append, 2**70)
+		self.assertRaises(sorter.NumbersTypeError, inst.__setitem__, 0, 2**70)
+	
+	def test_sorting_typed_storage(self):
+		'''Sort methods should work on the typed storage in place'''
+		a_list = [9, -2, 7, 7, 0, 3, -8, 1]
+		for method in ('bubble', 'insertion', 'insertion_sort_r',
+				'selection', 'merge_sort', 'sort'):
+			inst = sorter.Numbers(a_list, typecode='q')
+			getattr(inst, method)()
+			self.assertEqual(inst.a_list, array.array('q', sorted(a_list)))
+
+@unittest.skipIf(sorter.np is None, 'numpy is not installed')
+class NumbersClassNumpyBackend(unittest.TestCase):
+	
+	def test_ndarray_is_not_copied(self):
+		'''An ndarray passed to Numbers should be used as is'''
+		a_list = sorter.np.array([3.5, -1.0, 2.25])
+		inst = sorter.Numbers(a_list)
+		self.assertIs(inst.a_list, a_list)
+	
+	def test_ndarray_bad_dtype(self):
+		'''Non-numeric and multi-dimensional arrays should be rejected'''
+		np = sorter.np
+		self.assertRaises(sorter.NumbersTypeError,
+			sorter.Numbers, np.array(['a', 'b']))
+		self.assertRaises(sorter.NumbersTypeError,
+			sorter.Numbers, np.zeros((2, 2)))
+		inst = sorter.Numbers(np.array([1, 2, 3]))
+		self.assertRaises(sorter.NumbersTypeError, inst.__setitem__, 0, 1.5)
+		self.assertRaises(sorter.NumbersTypeError, inst.append, 'Niko')
+	
+	def test_ndarray_dtype_is_kept(self):
+		'''Values not fitting the dtype should be rejected, not promoted'''
+		np = sorter.np
+		inst = sorter.Numbers(np.array([3, 1, 2]))
+		self.assertRaises(sorter.NumbersTypeError, inst.append, 2**70)
+		self.assertRaises(sorter.NumbersTypeError, inst.__setitem__, 0, 2**70)
+		self.assertEqual(inst.max(), 3)
+		inst = sorter.Numbers(np.array([1, 2], dtype=np.uint8))
+		for value in (300, -1):
+			self.assertRaises(sorter.NumbersTypeError, inst.append, value)
+			self.assertRaises(sorter.NumbersTypeError,
+				inst.__setitem__, 0, value)
+		inst.append(255)
+		self.assertEqual(inst.a_list.dtype, np.uint8)
+		self.assertEqual(inst.a_list.tolist(), [1, 2, 255])
+		inst = sorter.Numbers(np.array([1.5], dtype=np.float32))
+		inst.append(2.5)
+		self.assertEqual(inst.a_list.dtype, np.float32)
+		self.assertRaises(sorter.NumbersTypeError, inst.append, 1e300)
+		inst.append(float('inf'))
+		self.assertEqual(inst.max(), float('inf'))
+	
+	def test_ndarray_sort_min_max_contains(self):
+		'''Sorting, min/max and membership should work on ndarrays'''
+		np = sorter.np
+		a_list = [12, 3, 7, 9, 14, 6, 11, 2, 7]
+		for method in ('insertion', 'selection', 'merge_sort', 'sort'):
+			inst = sorter.Numbers(np.array(a_list))
+			getattr(inst, method)()
+			self.assertListEqual(inst.a_list.tolist(), sorted(a_list))
+		inst = sorter.Numbers(np.array(a_list))
+		self.assertListEqual(inst.nsmallest(3), [2, 3, 6])
+		self.assertListEqual(inst.nlargest(3), [14, 12, 11])
+		self.assertEqual(inst.nth_element(4), 7)
+		inst.partial_sort(3)
+		self.assertListEqual(inst.a_list[:3].tolist(), [2, 3, 6])
+		self.assertEqual(inst.min(), 2)
+		self.assertEqual(inst.max(), 14)
+		self.assertIn(9, inst)
+		self.assertNotIn(10, inst)
+		self.assertNotIn('9', inst)
+		inst.append(1)
+		self.assertEqual(inst.min(), 1)
+	
+	def test_merge_ndarray(self):
+		'''merge should not be confused by numpy slices being views'''
+		a_list = sorter.np.array([2, 4, 6, 7, 1, 2, 3, 5])
+		sorter.Numbers.merge(a_list, 0, 3, 7)
+		self.assertListEqual(a_list.tolist(), [1, 2, 2, 3, 4, 5, 6, 7])
+
+class NumbersClassParallelSort(unittest.TestCase):
+	
+	def test_parallel_sort(self):
+		'''parallel_sort should sort ints and floats across processes'''
+		rng = random.Random(2)
+		n = sorter.PARALLEL_THRESHOLD + 11
+		a_list = [rng.randint(-2**40, 2**40) for _ in range(n)]
+		inst = sorter.Numbers(list(a_list))
+		inst.parallel_sort(workers=3)
+		self.assertListEqual(inst.a_list, sorted(a_list))
+		b_list = [rng.uniform(-1, 1) for _ in range(n)]
+		inst = sorter.Numbers(b_list, typecode='d')
+		inst.parallel_sort(workers=2)
+		self.assertEqual(list(inst.a_list), sorted(b_list))
+	
+	def test_parallel_sort_fallback(self):
+		'''Short or mixed int/float lists should be sorted in-process'''
+		a_list = [3, 1.5, -2, 0.25, 2**70]
+		inst = sorter.Numbers(list(a_list))
+		inst.parallel_sort(workers=4)
+		self.assertListEqual(inst.a_list, sorted(a_list))
+		self.assertRaises(ValueError, inst.parallel_sort, 0)
+		bools = [True, False] * (sorter.PARALLEL_THRESHOLD // 2 + 1)
+		inst = sorter.Numbers(list(bools))
+		inst.parallel_sort(workers=2)
+		self.assertListEqual(inst.a_list, sorted(bools))
+		self.assertIs(type(inst.a_list[0]), bool)
+
+class NumbersClassRadixSort(unittest.TestCase):
+	
+	def test_radix_sort_integers(self):
+		'''radix_sort should order ints of any sign and range'''
+		rng = random.Random(4)
+		for bound in (1, 1000, 2**40, 2**70):
+			a_list = [rng.randint(-bound, bound) for _ in range(3000)]
+			inst = sorter.Numbers(list(a_list))
+			inst.radix_sort()
+			self.assertListEqual(inst.a_list, sorted(a_list))
+		inst = sorter.Numbers(array.array('q', [5, -3, 0, 2**62, -2**63]))
+		inst.radix_sort()
+		self.assertEqual(inst.a_list.tolist(), [-2**63, -3, 0, 5, 2**62])
+	
+	def test_radix_sort_floats(self):
+		'''radix_sort should order floats including -0.0 and infinities'''
+		a_list = [1.5, -0.0, 0.0, -2.25, float('inf'), -1e-300, 3e200,
+			float('-inf'), 0.0, -0.0, -7.5]
+		inst = sorter.Numbers(list(a_list))
+		inst.radix_sort()
+		self.assertListEqual(inst.a_list, sorted(a_list))
+		self.assertEqual([str(x) for x in inst.a_list[4:8]],
+			['-0.0', '-0.0', '0.0', '0.0'])
+		inst = sorter.Numbers(a_list, typecode='d')
+		inst.radix_sort()
+		self.assertEqual(inst.a_list.tolist(), sorted(a_list))
+		# the minimum found is 0.0 although -0.0 has the smaller key
+		inst = sorter.Numbers([0.0, 3.5, -0.0, 1.0, 0.0])
+		inst.radix_sort()
+		self.assertEqual([str(x) for x in inst.a_list],
+			['-0.0', '0.0', '0.0', '1.0', '3.5'])
+	
+	def test_sort_without_radix_allocates_no_keys(self):
+		'''Choosing merge sort should not build the radix keys first'''
+		rng = random.Random(6)
+		for typecode, a_list in (
+				('q', [rng.randint(-2**60, 2**60) for _ in range(50000)]),
+				('d', [rng.uniform(-1, 1) for _ in range(50000)])):
+			typed = array.array(typecode, a_list)
+			tracemalloc.start()
+			try:
+				sorter.Numbers(typed).sort()
+				peak = tracemalloc.get_traced_memory()[1]
+			finally:
+				tracemalloc.stop()
+			self.assertEqual(typed.tolist(), sorted(a_list))
+			# the scratch array of the merge and little else
+			self.assertLess(peak, 1.5 * len(typed) * typed.itemsize)
+	
+	def test_radix_sort_mixed(self):
+		'''Mixed int/float lists should still be sorted'''
+		a_list = [3, 1.5, -2, 0.25, 2**70, 1]
+		inst = sorter.Numbers(list(a_list))
+		inst.radix_sort()
+		self.assertListEqual(inst.a_list, sorted(a_list))
+	
+	def test_sort_picks_radix_for_narrow_range(self):
+		'''sort should use radix sort for ints from a narrow range'''
+		rng = random.Random(5)
+		a_list = [rng.randint(0, 255) for _ in range(5000)]
+		inst = sorter.Numbers(list(a_list))
+		with unittest.mock.patch.object(inst, '_merge_sort_bu') as merge:
+			inst.sort()
+		merge.assert_not_called()
+		self.assertListEqual(inst.a_list, sorted(a_list))
+
+class NumbersClassPartialSorting(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(6)
+		self.a_list = [rng.randint(-500, 500) for _ in range(2000)]
+		self.a_list += [rng.uniform(-500, 500) for _ in range(1000)]
+	
+	def test_nsmallest_nlargest(self):
+		'''Top-k queries should not modify the list'''
+		inst = sorter.Numbers(list(self.a_list))
+		self.assertListEqual(inst.nsmallest(30), sorted(self.a_list)[:30])
+		self.assertListEqual(inst.nlargest(30),
+			sorted(self.a_list, reverse=True)[:30])
+		self.assertListEqual(inst.nsmallest(0), [])
+		self.assertListEqual(inst.a_list, self.a_list)
+	
+	def test_nth_element(self):
+		'''nth_element should partition the list around its k-th element'''
+		correct_result = sorted(self.a_list)
+		for k in (0, 1, 1499, 2998, 2999, -1):
+			inst = sorter.Numbers(list(self.a_list))
+			value = inst.nth_element(k)
+			self.assertEqual(value, correct_result[k])
+			k %= len(self.a_list)
+			self.assertTrue(all(x <= value for x in inst.a_list[:k]))
+			self.assertTrue(all(x >= value for x in inst.a_list[k+1:]))
+		inst = sorter.Numbers([7] * 100)
+		self.assertEqual(inst.nth_element(50), 7)
+		self.assertRaises(IndexError, inst.nth_element, 100)
+	
+	def test_median_of_medians(self):
+		'''The fallback pivot should lie between the 30th and 70th percentile'''
+		inst = sorter.Numbers(list(self.a_list))
+		pivot = inst._median_of_medians(inst.a_list, 0, len(inst) - 1)
+		correct_result = sorted(self.a_list)
+		self.assertLessEqual(correct_result[len(inst) * 3 // 10], pivot)
+		self.assertLessEqual(pivot, correct_result[len(inst) * 7 // 10])
+	
+	def test_partial_sort(self):
+		'''partial_sort should leave the k smallest elements sorted in front'''
+		for k in (0, 1, 100, 3000):
+			inst = sorter.Numbers(list(self.a_list))
+			inst.partial_sort(k)
+			self.assertListEqual(inst.a_list[:k], sorted(self.a_list)[:k])
+			self.assertListEqual(sorted(inst.a_list), sorted(self.a_list))
+		inst = sorter.Numbers(self.a_list, typecode='d')
+		inst.partial_sort(10)
+		self.assertEqual(inst.a_list[:10].tolist(), sorted(self.a_list)[:10])
+
+class NumbersClassInstrumentation(unittest.TestCase):
+	
+	def test_disabled_by_default(self):
+		'''Without instrument=True no stats should be collected'''
+		inst = sorter.Numbers([3, 2, 1])
+		inst.sort()
+		self.assertIsNone(inst.stats)
+	
+	def test_bubble_counts(self):
+		'''Bubble sort of a reversed list compares and swaps every pair'''
+		n = 20
+		inst = sorter.Numbers(list(range(n, 0, -1)), instrument=True)
+		inst.bubble()
+		pairs = n * (n - 1) // 2
+		self.assertEqual(inst.stats.comparisons, pairs)
+		self.assertEqual(inst.stats.swaps, pairs)
+		self.assertEqual(inst.stats.moves, 2 * pairs)
+		self.assertEqual(inst.stats.allocations, 0)
+		self.assertListEqual(inst.a_list, list(range(1, n + 1)))
+		self.assertTrue(all(type(x) is int for x in inst.a_list))
+	
+	def test_depth_and_allocations(self):
+		'''Recursion depth and copies should be reported per algorithm'''
+		a_list = [5.5, -1, 3, 8, 2.25, 0, 9, 7] * 8
+		inst = sorter.Numbers(list(a_list), instrument=True)
+		inst.insertion_sort_r()
+		self.assertEqual(inst.stats.max_depth, len(a_list))
+		inst = sorter.Numbers(list(a_list), instrument=True)
+		inst.merge_sort()
+		self.assertEqual(inst.stats.max_depth, 7)
+		self.assertEqual(inst.stats.allocations, 2 * (len(a_list) - 1))
+		inst = sorter.Numbers(list(a_list), instrument=True)
+		inst.merge_sort_bu()
+		self.assertEqual(inst.stats.max_depth, 1)
+		self.assertEqual(inst.stats.allocations, 1)
+		self.assertListEqual(inst.a_list, sorted(a_list))
+	
+	def test_typed_storage_and_results(self):
+		'''Storage and returned values should not leak the proxies'''
+		a_list = array.array('d', [4.5, -2.0, 9.25, 0.0])
+		inst = sorter.Numbers(a_list, instrument=True)
+		self.assertEqual(inst.nsmallest(2), [-2.0, 0.0])
+		self.assertIs(type(inst.nth_element(1)), float)
+		inst.sort()
+		self.assertIs(inst.a_list, a_list)
+		self.assertEqual(a_list.tolist(), [-2.0, 0.0, 4.5, 9.25])
+		self.assertGreater(inst.stats.comparisons, 0)
+
+class NumbersClassRangeQueries(unittest.TestCase):
+	
+	def setUp(self):
+		rng = random.Random(4)
+		self.a_list = [rng.randint(-100, 100) for _ in range(200)]
+	
+	def test_range_queries(self):
+		'''Range queries should match the aggregates of slices.'''
+		inst = sorter.Numbers(list(self.a_list))
+		for lo, hi in ((0, 200), (5, 6), (33, 150), (199, 200)):
+			self.assertEqual(inst.range_sum(lo, hi), sum(self.a_list[lo:hi]))
+			self.assertEqual(inst.range_min(lo, hi), min(self.a_list[lo:hi]))
+			self.assertEqual(inst.range_max(lo, hi), max(self.a_list[lo:hi]))
+		self.assertEqual(inst.prefix_sum(50), sum(self.a_list[:50]))
+		self.assertEqual(inst.range_sum(7, 7), 0)
+		self.assertRaises(ValueError, inst.range_min, 7, 7)
+		self.assertRaises(IndexError, inst.range_max, 0, 201)
+	
+	def test_point_updates_in_sync(self):
+		'''__setitem__ and append should update the index in place.'''
+		inst = sorter.Numbers(array.array('q', self.a_list))
+		inst.range_sum(0, 1)
+		trees = inst._ranges
+		inst[10] = 1000
+		inst[-1] = -1000
+		inst.append(2000)
+		self.assertIs(inst._ranges, trees)
+		self.assertEqual(inst.range_max(0, 201), 2000)
+		self.assertEqual(inst.range_min(0, 200), -1000)
+		self.assertEqual(inst.range_sum(0, 201), sum(inst.a_list))
+		self.assertIs(inst._ranges, trees)
+	
+	def test_other_changes_rebuild(self):
+		'''Other modifications should make the index rebuild.'''
+		inst = sorter.Numbers(list(self.a_list))
+		self.assertEqual(inst.range_min(0, 10), min(self.a_list[:10]))
+		inst.sort()
+		self.assertEqual(inst.range_min(0, 10), min(self.a_list))
+		del inst[0]
+		self.assertEqual(inst.range_sum(0, 199),
+				sum(self.a_list) - min(self.a_list))
+		inst = sorter.Numbers(array.array('q', self.a_list))
+		inst.range_max(0, 2)
+		inst[0:2] = array.array('q', [7, 7])
+		self.assertEqual(inst.range_max(0, 2), 7)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=0)
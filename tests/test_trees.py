@@ -0,0 +1,100 @@
+import operator
+import random
+import unittest
+import datastructures.trees as trees
+
+class Fenwick(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.values = [rng.randint(-50, 50) for _ in range(100)]
+
+    def test_fenwick_tree_sums(self):
+        """Prefix and range sums should match the sums of slices."""
+        tree = trees.FenwickTree(self.values)
+        self.assertEqual(len(tree), len(self.values))
+        for i in range(len(self.values)+1):
+            self.assertEqual(tree.prefix_sum(i), sum(self.values[:i]))
+        for lo, hi in ((0, 100), (3, 4), (17, 64), (50, 50)):
+            self.assertEqual(tree.range_sum(lo, hi),
+                             sum(self.values[lo:hi]))
+        with self.assertRaises(IndexError):
+            tree.prefix_sum(101)
+        with self.assertRaises(IndexError):
+            tree.range_sum(5, 4)
+
+    def test_fenwick_tree_update_and_append(self):
+        """Updates and appends should be reflected by the sums."""
+        tree = trees.FenwickTree()
+        values = []
+        for value in self.values:
+            tree.append(value)
+            values.append(value)
+        rng = random.Random(2)
+        for _ in range(50):
+            i = rng.randrange(len(values))
+            values[i] = rng.randint(-50, 50)
+            tree.update(i, values[i])
+            self.assertEqual(tree.prefix_sum(i+1), sum(values[:i+1]))
+        self.assertEqual(tree, trees.FenwickTree(values))
+        with self.assertRaises(IndexError):
+            tree.update(len(values), 0)
+
+    def test_fenwick_tree_float_update(self):
+        """Float updates should leave the tree as if it was rebuilt."""
+        rng = random.Random(4)
+        values = [rng.uniform(-1, 1) * 10**rng.randint(-8, 16)
+                  for _ in range(100)]
+        tree = trees.FenwickTree(values)
+        for _ in range(500):
+            i = rng.randrange(len(values))
+            values[i] = rng.uniform(-1, 1) * 10**rng.randint(-8, 16)
+            tree.update(i, values[i])
+        self.assertEqual(tree, trees.FenwickTree(values))
+        # an infinity must not leave nan behind once it is replaced
+        tree.update(10, float('inf'))
+        self.assertEqual(tree.prefix_sum(100), float('inf'))
+        tree.update(10, values[10])
+        self.assertEqual(tree, trees.FenwickTree(values))
+        tree.update(3, 1)
+        values[3] = 1
+        self.assertEqual(tree, trees.FenwickTree(values))
+
+
+class Segment(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.values = [rng.uniform(-1, 1) for _ in range(77)]
+
+    def test_segment_tree_queries(self):
+        """Queries should aggregate the slices with the operation."""
+        minima = trees.SegmentTree(self.values)
+        maxima = trees.SegmentTree(self.values, max, float('-inf'))
+        sums = trees.SegmentTree(range(10), operator.add, 0)
+        for lo in range(0, 77, 5):
+            for hi in range(lo+1, 78, 7):
+                self.assertEqual(minima.query(lo, hi),
+                                 min(self.values[lo:hi]))
+                self.assertEqual(maxima.query(lo, hi),
+                                 max(self.values[lo:hi]))
+        self.assertEqual(sums.query(2, 7), 20)
+        self.assertEqual(minima.query(4, 4), float('inf'))
+        with self.assertRaises(IndexError):
+            minima.query(0, 78)
+
+    def test_segment_tree_update_and_append(self):
+        """Updates and appends (growing the capacity) should be kept."""
+        tree = trees.SegmentTree(op=max, identity=float('-inf'))
+        for value in self.values:
+            tree.append(value)
+        self.assertEqual(len(tree), 77)
+        self.assertEqual(tree.capacity, 128)
+        self.assertEqual(tree.query(0, 77), max(self.values))
+        tree.update(10, 5.0)
+        self.assertEqual(tree.query(0, 77), 5.0)
+        self.assertEqual(tree.query(11, 77), max(self.values[11:]))
+        with self.assertRaises(IndexError):
+            tree.update(77, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=0)